@@ -22,13 +22,16 @@ const (
 )
 
 // Image data in raw format
+// Raw pixels are cheapest to consume as "bgr". For "jpeg", width and height
+// should be set: large images are then decoded downscaled for detection.
+// Raw frames are accepted up to 3840x2160.
 type Image struct {
 	state         protoimpl.MessageState `protogen:"open.v1"`
 	Data          []byte                 `protobuf:"bytes,1,opt,name=data,proto3" json:"data,omitempty"`          // Raw image bytes (JPEG/PNG) or raw pixel data
 	Width         int32                  `protobuf:"varint,2,opt,name=width,proto3" json:"width,omitempty"`       // Image width
 	Height        int32                  `protobuf:"varint,3,opt,name=height,proto3" json:"height,omitempty"`     // Image height
 	Channels      int32                  `protobuf:"varint,4,opt,name=channels,proto3" json:"channels,omitempty"` // Number of channels (1=grayscale, 3=RGB)
-	Format        string                 `protobuf:"bytes,5,opt,name=format,proto3" json:"format,omitempty"`      // Format: "jpeg", "png", "raw"
+	Format        string                 `protobuf:"bytes,5,opt,name=format,proto3" json:"format,omitempty"`      // Format: "jpeg", "png", "raw" (RGB/gray pixels), "bgr" (raw BGR pixels)
 	unknownFields protoimpl.UnknownFields
 	sizeCache     protoimpl.SizeCache
 }
@@ -721,6 +724,112 @@ func (x *HealthResponse) GetModelsLoaded() []string {
 	return nil
 }
 
+// Batch embedding extraction request
+type EmbeddingBatchRequest struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	Image         *Image                 `protobuf:"bytes,1,opt,name=image,proto3" json:"image,omitempty"` // Full image
+	Faces         []*Detection           `protobuf:"bytes,2,rep,name=faces,proto3" json:"faces,omitempty"` // Face bounding boxes and landmarks
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *EmbeddingBatchRequest) Reset() {
+	*x = EmbeddingBatchRequest{}
+	mi := &file_api_inference_proto_msgTypes[12]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *EmbeddingBatchRequest) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*EmbeddingBatchRequest) ProtoMessage() {}
+
+func (x *EmbeddingBatchRequest) ProtoReflect() protoreflect.Message {
+	mi := &file_api_inference_proto_msgTypes[12]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use EmbeddingBatchRequest.ProtoReflect.Descriptor instead.
+func (*EmbeddingBatchRequest) Descriptor() ([]byte, []int) {
+	return file_api_inference_proto_rawDescGZIP(), []int{12}
+}
+
+func (x *EmbeddingBatchRequest) GetImage() *Image {
+	if x != nil {
+		return x.Image
+	}
+	return nil
+}
+
+func (x *EmbeddingBatchRequest) GetFaces() []*Detection {
+	if x != nil {
+		return x.Faces
+	}
+	return nil
+}
+
+// Batch embedding extraction response
+type EmbeddingBatchResponse struct {
+	state           protoimpl.MessageState `protogen:"open.v1"`
+	Embeddings      []*Embedding           `protobuf:"bytes,1,rep,name=embeddings,proto3" json:"embeddings,omitempty"` // One per requested face, in order
+	InferenceTimeMs int32                  `protobuf:"varint,2,opt,name=inference_time_ms,json=inferenceTimeMs,proto3" json:"inference_time_ms,omitempty"`
+	unknownFields   protoimpl.UnknownFields
+	sizeCache       protoimpl.SizeCache
+}
+
+func (x *EmbeddingBatchResponse) Reset() {
+	*x = EmbeddingBatchResponse{}
+	mi := &file_api_inference_proto_msgTypes[13]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *EmbeddingBatchResponse) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*EmbeddingBatchResponse) ProtoMessage() {}
+
+func (x *EmbeddingBatchResponse) ProtoReflect() protoreflect.Message {
+	mi := &file_api_inference_proto_msgTypes[13]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use EmbeddingBatchResponse.ProtoReflect.Descriptor instead.
+func (*EmbeddingBatchResponse) Descriptor() ([]byte, []int) {
+	return file_api_inference_proto_rawDescGZIP(), []int{13}
+}
+
+func (x *EmbeddingBatchResponse) GetEmbeddings() []*Embedding {
+	if x != nil {
+		return x.Embeddings
+	}
+	return nil
+}
+
+func (x *EmbeddingBatchResponse) GetInferenceTimeMs() int32 {
+	if x != nil {
+		return x.InferenceTimeMs
+	}
+	return 0
+}
+
 var File_api_inference_proto protoreflect.FileDescriptor
 
 const file_api_inference_proto_rawDesc = "" +
@@ -775,10 +884,19 @@ const file_api_inference_proto_rawDesc = "" +
 	"\ahealthy\x18\x01 \x01(\bR\ahealthy\x12\x18\n" +
 	"\aversion\x18\x02 \x01(\tR\aversion\x12\x16\n" +
 	"\x06device\x18\x03 \x01(\tR\x06device\x12#\n" +
-	"\rmodels_loaded\x18\x04 \x03(\tR\fmodelsLoaded2\xf3\x02\n" +
+	"\rmodels_loaded\x18\x04 \x03(\tR\fmodelsLoaded\"}\n" +
+	"\x15EmbeddingBatchRequest\x12/\n" +
+	"\x05image\x18\x01 \x01(\v2\x19.facelock.inference.ImageR\x05image\x123\n" +
+	"\x05faces\x18\x02 \x03(\v2\x1d.facelock.inference.DetectionR\x05faces\"\x83\x01\n" +
+	"\x16EmbeddingBatchResponse\x12=\n" +
+	"\n" +
+	"embeddings\x18\x01 \x03(\v2\x1d.facelock.inference.EmbeddingR\n" +
+	"embeddings\x12*\n" +
+	"\x11inference_time_ms\x18\x02 \x01(\x05R\x0finferenceTimeMs2\xdf\x03\n" +
 	"\rFaceInference\x12T\n" +
 	"\vDetectFaces\x12!.facelock.inference.DetectRequest\x1a\".facelock.inference.DetectResponse\x12_\n" +
-	"\x10ExtractEmbedding\x12$.facelock.inference.EmbeddingRequest\x1a%.facelock.inference.EmbeddingResponse\x12Z\n" +
+	"\x10ExtractEmbedding\x12$.facelock.inference.EmbeddingRequest\x1a%.facelock.inference.EmbeddingResponse\x12j\n" +
+	"\x11ExtractEmbeddings\x12).facelock.inference.EmbeddingBatchRequest\x1a*.facelock.inference.EmbeddingBatchResponse\x12Z\n" +
 	"\rCheckLiveness\x12#.facelock.inference.LivenessRequest\x1a$.facelock.inference.LivenessResponse\x12O\n" +
 	"\x06Health\x12!.facelock.inference.HealthRequest\x1a\".facelock.inference.HealthResponseB\x11Z\x0f./api;inferenceb\x06proto3"
 
@@ -794,20 +912,22 @@ func file_api_inference_proto_rawDescGZIP() []byte {
 	return file_api_inference_proto_rawDescData
 }
 
-var file_api_inference_proto_msgTypes = make([]protoimpl.MessageInfo, 12)
+var file_api_inference_proto_msgTypes = make([]protoimpl.MessageInfo, 14)
 var file_api_inference_proto_goTypes = []any{
-	(*Image)(nil),             // 0: facelock.inference.Image
-	(*Detection)(nil),         // 1: facelock.inference.Detection
-	(*Landmark)(nil),          // 2: facelock.inference.Landmark
-	(*Embedding)(nil),         // 3: facelock.inference.Embedding
-	(*DetectRequest)(nil),     // 4: facelock.inference.DetectRequest
-	(*DetectResponse)(nil),    // 5: facelock.inference.DetectResponse
-	(*EmbeddingRequest)(nil),  // 6: facelock.inference.EmbeddingRequest
-	(*EmbeddingResponse)(nil), // 7: facelock.inference.EmbeddingResponse
-	(*LivenessRequest)(nil),   // 8: facelock.inference.LivenessRequest
-	(*LivenessResponse)(nil),  // 9: facelock.inference.LivenessResponse
-	(*HealthRequest)(nil),     // 10: facelock.inference.HealthRequest
-	(*HealthResponse)(nil),    // 11: facelock.inference.HealthResponse
+	(*Image)(nil),                  // 0: facelock.inference.Image
+	(*Detection)(nil),              // 1: facelock.inference.Detection
+	(*Landmark)(nil),               // 2: facelock.inference.Landmark
+	(*Embedding)(nil),              // 3: facelock.inference.Embedding
+	(*DetectRequest)(nil),          // 4: facelock.inference.DetectRequest
+	(*DetectResponse)(nil),         // 5: facelock.inference.DetectResponse
+	(*EmbeddingRequest)(nil),       // 6: facelock.inference.EmbeddingRequest
+	(*EmbeddingResponse)(nil),      // 7: facelock.inference.EmbeddingResponse
+	(*LivenessRequest)(nil),        // 8: facelock.inference.LivenessRequest
+	(*LivenessResponse)(nil),       // 9: facelock.inference.LivenessResponse
+	(*HealthRequest)(nil),          // 10: facelock.inference.HealthRequest
+	(*HealthResponse)(nil),         // 11: facelock.inference.HealthResponse
+	(*EmbeddingBatchRequest)(nil),  // 12: facelock.inference.EmbeddingBatchRequest
+	(*EmbeddingBatchResponse)(nil), // 13: facelock.inference.EmbeddingBatchResponse
 }
 var file_api_inference_proto_depIdxs = []int32{
 	2,  // 0: facelock.inference.Detection.landmarks:type_name -> facelock.inference.Landmark
@@ -818,19 +938,24 @@ var file_api_inference_proto_depIdxs = []int32{
 	3,  // 5: facelock.inference.EmbeddingResponse.embedding:type_name -> facelock.inference.Embedding
 	0,  // 6: facelock.inference.LivenessRequest.image:type_name -> facelock.inference.Image
 	1,  // 7: facelock.inference.LivenessRequest.face:type_name -> facelock.inference.Detection
-	4,  // 8: facelock.inference.FaceInference.DetectFaces:input_type -> facelock.inference.DetectRequest
-	6,  // 9: facelock.inference.FaceInference.ExtractEmbedding:input_type -> facelock.inference.EmbeddingRequest
-	8,  // 10: facelock.inference.FaceInference.CheckLiveness:input_type -> facelock.inference.LivenessRequest
-	10, // 11: facelock.inference.FaceInference.Health:input_type -> facelock.inference.HealthRequest
-	5,  // 12: facelock.inference.FaceInference.DetectFaces:output_type -> facelock.inference.DetectResponse
-	7,  // 13: facelock.inference.FaceInference.ExtractEmbedding:output_type -> facelock.inference.EmbeddingResponse
-	9,  // 14: facelock.inference.FaceInference.CheckLiveness:output_type -> facelock.inference.LivenessResponse
-	11, // 15: facelock.inference.FaceInference.Health:output_type -> facelock.inference.HealthResponse
-	12, // [12:16] is the sub-list for method output_type
-	8,  // [8:12] is the sub-list for method input_type
-	8,  // [8:8] is the sub-list for extension type_name
-	8,  // [8:8] is the sub-list for extension extendee
-	0,  // [0:8] is the sub-list for field type_name
+	0,  // 8: facelock.inference.EmbeddingBatchRequest.image:type_name -> facelock.inference.Image
+	1,  // 9: facelock.inference.EmbeddingBatchRequest.faces:type_name -> facelock.inference.Detection
+	3,  // 10: facelock.inference.EmbeddingBatchResponse.embeddings:type_name -> facelock.inference.Embedding
+	4,  // 11: facelock.inference.FaceInference.DetectFaces:input_type -> facelock.inference.DetectRequest
+	6,  // 12: facelock.inference.FaceInference.ExtractEmbedding:input_type -> facelock.inference.EmbeddingRequest
+	12, // 13: facelock.inference.FaceInference.ExtractEmbeddings:input_type -> facelock.inference.EmbeddingBatchRequest
+	8,  // 14: facelock.inference.FaceInference.CheckLiveness:input_type -> facelock.inference.LivenessRequest
+	10, // 15: facelock.inference.FaceInference.Health:input_type -> facelock.inference.HealthRequest
+	5,  // 16: facelock.inference.FaceInference.DetectFaces:output_type -> facelock.inference.DetectResponse
+	7,  // 17: facelock.inference.FaceInference.ExtractEmbedding:output_type -> facelock.inference.EmbeddingResponse
+	13, // 18: facelock.inference.FaceInference.ExtractEmbeddings:output_type -> facelock.inference.EmbeddingBatchResponse
+	9,  // 19: facelock.inference.FaceInference.CheckLiveness:output_type -> facelock.inference.LivenessResponse
+	11, // 20: facelock.inference.FaceInference.Health:output_type -> facelock.inference.HealthResponse
+	16, // [16:21] is the sub-list for method output_type
+	11, // [11:16] is the sub-list for method input_type
+	11, // [11:11] is the sub-list for extension type_name
+	11, // [11:11] is the sub-list for extension extendee
+	0,  // [0:11] is the sub-list for field type_name
 }
 
 func init() { file_api_inference_proto_init() }
@@ -844,7 +969,7 @@ func file_api_inference_proto_init() {
 			GoPackagePath: reflect.TypeOf(x{}).PkgPath(),
 			RawDescriptor: unsafe.Slice(unsafe.StringData(file_api_inference_proto_rawDesc), len(file_api_inference_proto_rawDesc)),
 			NumEnums:      0,
-			NumMessages:   12,
+			NumMessages:   14,
 			NumExtensions: 0,
 			NumServices:   1,
 		},
@@ -19,10 +19,11 @@ import (
 const _ = grpc.SupportPackageIsVersion9
 
 const (
-	FaceInference_DetectFaces_FullMethodName      = "/facelock.inference.FaceInference/DetectFaces"
-	FaceInference_ExtractEmbedding_FullMethodName = "/facelock.inference.FaceInference/ExtractEmbedding"
-	FaceInference_CheckLiveness_FullMethodName    = "/facelock.inference.FaceInference/CheckLiveness"
-	FaceInference_Health_FullMethodName           = "/facelock.inference.FaceInference/Health"
+	FaceInference_DetectFaces_FullMethodName       = "/facelock.inference.FaceInference/DetectFaces"
+	FaceInference_ExtractEmbedding_FullMethodName  = "/facelock.inference.FaceInference/ExtractEmbedding"
+	FaceInference_ExtractEmbeddings_FullMethodName = "/facelock.inference.FaceInference/ExtractEmbeddings"
+	FaceInference_CheckLiveness_FullMethodName     = "/facelock.inference.FaceInference/CheckLiveness"
+	FaceInference_Health_FullMethodName            = "/facelock.inference.FaceInference/Health"
 )
 
 // FaceInferenceClient is the client API for FaceInference service.
@@ -35,6 +36,8 @@ type FaceInferenceClient interface {
 	DetectFaces(ctx context.Context, in *DetectRequest, opts ...grpc.CallOption) (*DetectResponse, error)
 	// Extract face embedding from aligned face image
 	ExtractEmbedding(ctx context.Context, in *EmbeddingRequest, opts ...grpc.CallOption) (*EmbeddingResponse, error)
+	// Extract embeddings for several faces of one image in a single model run
+	ExtractEmbeddings(ctx context.Context, in *EmbeddingBatchRequest, opts ...grpc.CallOption) (*EmbeddingBatchResponse, error)
 	// Check if face is real (liveness detection)
 	CheckLiveness(ctx context.Context, in *LivenessRequest, opts ...grpc.CallOption) (*LivenessResponse, error)
 	// Health check
@@ -69,6 +72,16 @@ func (c *faceInferenceClient) ExtractEmbedding(ctx context.Context, in *Embeddin
 	return out, nil
 }
 
+func (c *faceInferenceClient) ExtractEmbeddings(ctx context.Context, in *EmbeddingBatchRequest, opts ...grpc.CallOption) (*EmbeddingBatchResponse, error) {
+	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
+	out := new(EmbeddingBatchResponse)
+	err := c.cc.Invoke(ctx, FaceInference_ExtractEmbeddings_FullMethodName, in, out, cOpts...)
+	if err != nil {
+		return nil, err
+	}
+	return out, nil
+}
+
 func (c *faceInferenceClient) CheckLiveness(ctx context.Context, in *LivenessRequest, opts ...grpc.CallOption) (*LivenessResponse, error) {
 	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
 	out := new(LivenessResponse)
@@ -99,6 +112,8 @@ type FaceInferenceServer interface {
 	DetectFaces(context.Context, *DetectRequest) (*DetectResponse, error)
 	// Extract face embedding from aligned face image
 	ExtractEmbedding(context.Context, *EmbeddingRequest) (*EmbeddingResponse, error)
+	// Extract embeddings for several faces of one image in a single model run
+	ExtractEmbeddings(context.Context, *EmbeddingBatchRequest) (*EmbeddingBatchResponse, error)
 	// Check if face is real (liveness detection)
 	CheckLiveness(context.Context, *LivenessRequest) (*LivenessResponse, error)
 	// Health check
@@ -119,6 +134,9 @@ func (UnimplementedFaceInferenceServer) DetectFaces(context.Context, *DetectRequ
 func (UnimplementedFaceInferenceServer) ExtractEmbedding(context.Context, *EmbeddingRequest) (*EmbeddingResponse, error) {
 	return nil, status.Error(codes.Unimplemented, "method ExtractEmbedding not implemented")
 }
+func (UnimplementedFaceInferenceServer) ExtractEmbeddings(context.Context, *EmbeddingBatchRequest) (*EmbeddingBatchResponse, error) {
+	return nil, status.Error(codes.Unimplemented, "method ExtractEmbeddings not implemented")
+}
 func (UnimplementedFaceInferenceServer) CheckLiveness(context.Context, *LivenessRequest) (*LivenessResponse, error) {
 	return nil, status.Error(codes.Unimplemented, "method CheckLiveness not implemented")
 }
@@ -182,6 +200,24 @@ func _FaceInference_ExtractEmbedding_Handler(srv interface{}, ctx context.Contex
 	return interceptor(ctx, in, info, handler)
 }
 
+func _FaceInference_ExtractEmbeddings_Handler(srv interface{}, ctx context.Context, dec func(interface{}) error, interceptor grpc.UnaryServerInterceptor) (interface{}, error) {
+	in := new(EmbeddingBatchRequest)
+	if err := dec(in); err != nil {
+		return nil, err
+	}
+	if interceptor == nil {
+		return srv.(FaceInferenceServer).ExtractEmbeddings(ctx, in)
+	}
+	info := &grpc.UnaryServerInfo{
+		Server:     srv,
+		FullMethod: FaceInference_ExtractEmbeddings_FullMethodName,
+	}
+	handler := func(ctx context.Context, req interface{}) (interface{}, error) {
+		return srv.(FaceInferenceServer).ExtractEmbeddings(ctx, req.(*EmbeddingBatchRequest))
+	}
+	return interceptor(ctx, in, info, handler)
+}
+
 func _FaceInference_CheckLiveness_Handler(srv interface{}, ctx context.Context, dec func(interface{}) error, interceptor grpc.UnaryServerInterceptor) (interface{}, error) {
 	in := new(LivenessRequest)
 	if err := dec(in); err != nil {
@@ -233,6 +269,10 @@ var FaceInference_ServiceDesc = grpc.ServiceDesc{
 			MethodName: "ExtractEmbedding",
 			Handler:    _FaceInference_ExtractEmbedding_Handler,
 		},
+		{
+			MethodName: "ExtractEmbeddings",
+			Handler:    _FaceInference_ExtractEmbeddings_Handler,
+		},
 		{
 			MethodName: "CheckLiveness",
 			Handler:    _FaceInference_CheckLiveness_Handler,
@@ -0,0 +1,99 @@
+"""
+LinuxHello Detection Kernels
+Numba-compiled post-processing for the SCRFD face detector
+
+Numba is optional: when it is not installed the kernels are None and
+FaceDetector uses its NumPy implementations instead.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _to_original(value, offset, resized_bound, scale, original_bound):
+    """Map one 640x640 model-space coordinate back to the original image"""
+    return min(min(max(value - offset, np.float32(0.0)), resized_bound) / scale, original_bound)
+
+
+def _decode_scale(scores, bboxes, kps, centers, stride, conf_threshold,
+                  x_offset, y_offset, resized_w, resized_h, scale, original_w, original_h):
+    """Decode the anchors of one scale above the threshold into original image coordinates"""
+    count = 0
+    for i in range(scores.shape[0]):
+        if scores[i] >= conf_threshold:
+            count += 1
+
+    boxes = np.empty((count, 4), dtype=np.float32)
+    kept_scores = np.empty(count, dtype=np.float32)
+    landmarks = np.empty((count, 5, 2), dtype=np.float32)
+    j = 0
+    for i in range(scores.shape[0]):
+        if scores[i] < conf_threshold:
+            continue
+        cx = centers[i, 0]
+        cy = centers[i, 1]
+        boxes[j, 0] = _to_original(cx - bboxes[i, 0] * stride, x_offset, resized_w, scale, original_w)
+        boxes[j, 1] = _to_original(cy - bboxes[i, 1] * stride, y_offset, resized_h, scale, original_h)
+        boxes[j, 2] = _to_original(cx + bboxes[i, 2] * stride, x_offset, resized_w, scale, original_w)
+        boxes[j, 3] = _to_original(cy + bboxes[i, 3] * stride, y_offset, resized_h, scale, original_h)
+        for k in range(5):
+            landmarks[j, k, 0] = _to_original(cx + kps[i, 2 * k] * stride,
+                                              x_offset, resized_w, scale, original_w)
+            landmarks[j, k, 1] = _to_original(cy + kps[i, 2 * k + 1] * stride,
+                                              y_offset, resized_h, scale, original_h)
+        kept_scores[j] = scores[i]
+        j += 1
+    return boxes, kept_scores, landmarks
+
+
+def _nms(boxes, scores, threshold):
+    """Greedy non-maximum suppression; returns kept indices, best first"""
+    n = boxes.shape[0]
+    # Stable sort, so ties keep detection order
+    order = np.argsort(-scores, kind='mergesort')
+    suppressed = np.zeros(n, dtype=np.bool_)
+    keep = np.empty(n, dtype=np.intp)
+    count = 0
+    for a in range(n):
+        i = order[a]
+        if suppressed[i]:
+            continue
+        keep[count] = i
+        count += 1
+        area_i = (boxes[i, 2] - boxes[i, 0]) * (boxes[i, 3] - boxes[i, 1])
+        for b in range(a + 1, n):
+            j = order[b]
+            if suppressed[j]:
+                continue
+            inter_w = max(np.float32(0.0), min(boxes[i, 2], boxes[j, 2]) - max(boxes[i, 0], boxes[j, 0]))
+            inter_h = max(np.float32(0.0), min(boxes[i, 3], boxes[j, 3]) - max(boxes[i, 1], boxes[j, 1]))
+            intersection = inter_w * inter_h
+            union = area_i + (boxes[j, 2] - boxes[j, 0]) * (boxes[j, 3] - boxes[j, 1]) - intersection
+            if union > 0 and intersection / union >= threshold:
+                suppressed[j] = True
+    return keep[:count]
+
+
+if numba is not None:
+    # cache=True keeps the compiled code in __pycache__ across restarts
+    _to_original = numba.njit(cache=True, fastmath=True)(_to_original)
+    decode_scale_jit = numba.njit(cache=True, fastmath=True)(_decode_scale)
+    nms_jit = numba.njit(cache=True, fastmath=True)(_nms)
+else:
+    decode_scale_jit = None
+    nms_jit = None
+
+
+def warmup():
+    """Compile (or load from cache) the kernels for the types FaceDetector passes"""
+    if numba is None:
+        return
+    f32 = np.float32
+    empty = np.zeros((0, 4), dtype=f32)
+    decode_scale_jit(np.zeros(0, dtype=f32), empty, np.zeros((0, 10), dtype=f32),
+                     np.zeros((0, 2), dtype=f32), *(f32(0),) * 9)
+    nms_jit(empty, np.zeros(0, dtype=f32), f32(0.4))
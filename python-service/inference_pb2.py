@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0finference.proto\x12\x12\x66\x61\x63\x65lock.inference\"V\n\x05Image\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\r\n\x05width\x18\x02 \x01(\x05\x12\x0e\n\x06height\x18\x03 \x01(\x05\x12\x10\n\x08\x63hannels\x18\x04 \x01(\x05\x12\x0e\n\x06\x66ormat\x18\x05 \x01(\t\"\x80\x01\n\tDetection\x12\n\n\x02x1\x18\x01 \x01(\x02\x12\n\n\x02y1\x18\x02 \x01(\x02\x12\n\n\x02x2\x18\x03 \x01(\x02\x12\n\n\x02y2\x18\x04 \x01(\x02\x12\x12\n\nconfidence\x18\x05 \x01(\x02\x12/\n\tlandmarks\x18\x06 \x03(\x0b\x32\x1c.facelock.inference.Landmark\" \n\x08Landmark\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\"\x1b\n\tEmbedding\x12\x0e\n\x06values\x18\x01 \x03(\x02\"n\n\rDetectRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12\x1c\n\x14\x63onfidence_threshold\x18\x02 \x01(\x02\x12\x15\n\rnms_threshold\x18\x03 \x01(\x02\"^\n\x0e\x44\x65tectResponse\x12\x31\n\ndetections\x18\x01 \x03(\x0b\x32\x1d.facelock.inference.Detection\x12\x19\n\x11inference_time_ms\x18\x02 \x01(\x05\"i\n\x10\x45mbeddingRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12+\n\x04\x66\x61\x63\x65\x18\x02 \x01(\x0b\x32\x1d.facelock.inference.Detection\"`\n\x11\x45mbeddingResponse\x12\x30\n\tembedding\x18\x01 \x01(\x0b\x32\x1d.facelock.inference.Embedding\x12\x19\n\x11inference_time_ms\x18\x02 \x01(\x05\"h\n\x0fLivenessRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12+\n\x04\x66\x61\x63\x65\x18\x02 \x01(\x0b\x32\x1d.facelock.inference.Detection\"R\n\x10LivenessResponse\x12\x0f\n\x07is_live\x18\x01 \x01(\x08\x12\x12\n\nconfidence\x18\x02 \x01(\x02\x12\x19\n\x11inference_time_ms\x18\x03 \x01(\x05\"\x0f\n\rHealthRequest\"Y\n\x0eHealthResponse\x12\x0f\n\x07healthy\x18\x01 \x01(\x08\x12\x0f\n\x07version\x18\x02 \x01(\t\x12\x0e\n\x06\x64\x65vice\x18\x03 \x01(\t\x12\x15\n\rmodels_loaded\x18\x04 \x03(\t2\xf3\x02\n\rFaceInference\x12T\n\x0b\x44\x65tectFaces\x12!.facelock.inference.DetectRequest\x1a\".facelock.inference.DetectResponse\x12_\n\x10\x45xtractEmbedding\x12$.facelock.inference.EmbeddingRequest\x1a%.facelock.inference.EmbeddingResponse\x12Z\n\rCheckLiveness\x12#.facelock.inference.LivenessRequest\x1a$.facelock.inference.LivenessResponse\x12O\n\x06Health\x12!.facelock.inference.HealthRequest\x1a\".facelock.inference.HealthResponseB\x11Z\x0f./api;inferenceb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0finference.proto\x12\x12\x66\x61\x63\x65lock.inference\"V\n\x05Image\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\r\n\x05width\x18\x02 \x01(\x05\x12\x0e\n\x06height\x18\x03 \x01(\x05\x12\x10\n\x08\x63hannels\x18\x04 \x01(\x05\x12\x0e\n\x06\x66ormat\x18\x05 \x01(\t\"\x80\x01\n\tDetection\x12\n\n\x02x1\x18\x01 \x01(\x02\x12\n\n\x02y1\x18\x02 \x01(\x02\x12\n\n\x02x2\x18\x03 \x01(\x02\x12\n\n\x02y2\x18\x04 \x01(\x02\x12\x12\n\nconfidence\x18\x05 \x01(\x02\x12/\n\tlandmarks\x18\x06 \x03(\x0b\x32\x1c.facelock.inference.Landmark\" \n\x08Landmark\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\"\x1b\n\tEmbedding\x12\x0e\n\x06values\x18\x01 \x03(\x02\"n\n\rDetectRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12\x1c\n\x14\x63onfidence_threshold\x18\x02 \x01(\x02\x12\x15\n\rnms_threshold\x18\x03 \x01(\x02\"^\n\x0e\x44\x65tectResponse\x12\x31\n\ndetections\x18\x01 \x03(\x0b\x32\x1d.facelock.inference.Detection\x12\x19\n\x11inference_time_ms\x18\x02 \x01(\x05\"i\n\x10\x45mbeddingRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12+\n\x04\x66\x61\x63\x65\x18\x02 \x01(\x0b\x32\x1d.facelock.inference.Detection\"`\n\x11\x45mbeddingResponse\x12\x30\n\tembedding\x18\x01 \x01(\x0b\x32\x1d.facelock.inference.Embedding\x12\x19\n\x11inference_time_ms\x18\x02 \x01(\x05\"h\n\x0fLivenessRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12+\n\x04\x66\x61\x63\x65\x18\x02 \x01(\x0b\x32\x1d.facelock.inference.Detection\"R\n\x10LivenessResponse\x12\x0f\n\x07is_live\x18\x01 \x01(\x08\x12\x12\n\nconfidence\x18\x02 \x01(\x02\x12\x19\n\x11inference_time_ms\x18\x03 \x01(\x05\"\x0f\n\rHealthRequest\"Y\n\x0eHealthResponse\x12\x0f\n\x07healthy\x18\x01 \x01(\x08\x12\x0f\n\x07version\x18\x02 \x01(\t\x12\x0e\n\x06\x64\x65vice\x18\x03 \x01(\t\x12\x15\n\rmodels_loaded\x18\x04 \x03(\t\"o\n\x15\x45mbeddingBatchRequest\x12(\n\x05image\x18\x01 \x01(\x0b\x32\x19.facelock.inference.Image\x12,\n\x05\x66\x61\x63\x65s\x18\x02 \x03(\x0b\x32\x1d.facelock.inference.Detection\"f\n\x16\x45mbeddingBatchResponse\x12\x31\n\nembeddings\x18\x01 \x03(\x0b\x32\x1d.facelock.inference.Embedding\x12\x19\n\x11inference_time_ms\x18\x02 \x01(\x05\x32\xdf\x03\n\rFaceInference\x12T\n\x0b\x44\x65tectFaces\x12!.facelock.inference.DetectRequest\x1a\".facelock.inference.DetectResponse\x12_\n\x10\x45xtractEmbedding\x12$.facelock.inference.EmbeddingRequest\x1a%.facelock.inference.EmbeddingResponse\x12j\n\x11\x45xtractEmbeddings\x12).facelock.inference.EmbeddingBatchRequest\x1a*.facelock.inference.EmbeddingBatchResponse\x12Z\n\rCheckLiveness\x12#.facelock.inference.LivenessRequest\x1a$.facelock.inference.LivenessResponse\x12O\n\x06Health\x12!.facelock.inference.HealthRequest\x1a\".facelock.inference.HealthResponseB\x11Z\x0f./api;inferenceb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -56,6 +56,10 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_HEALTHREQUEST']._serialized_end=939
   _globals['_HEALTHRESPONSE']._serialized_start=941
   _globals['_HEALTHRESPONSE']._serialized_end=1030
-  _globals['_FACEINFERENCE']._serialized_start=1033
-  _globals['_FACEINFERENCE']._serialized_end=1404
+  _globals['_EMBEDDINGBATCHREQUEST']._serialized_start=1032
+  _globals['_EMBEDDINGBATCHREQUEST']._serialized_end=1143
+  _globals['_EMBEDDINGBATCHRESPONSE']._serialized_start=1145
+  _globals['_EMBEDDINGBATCHRESPONSE']._serialized_end=1247
+  _globals['_FACEINFERENCE']._serialized_start=1250
+  _globals['_FACEINFERENCE']._serialized_end=1729
 # @@protoc_insertion_point(module_scope)
@@ -45,6 +45,11 @@ class FaceInferenceStub(object):
                 request_serializer=inference__pb2.EmbeddingRequest.SerializeToString,
                 response_deserializer=inference__pb2.EmbeddingResponse.FromString,
                 _registered_method=True)
+        self.ExtractEmbeddings = channel.unary_unary(
+                '/facelock.inference.FaceInference/ExtractEmbeddings',
+                request_serializer=inference__pb2.EmbeddingBatchRequest.SerializeToString,
+                response_deserializer=inference__pb2.EmbeddingBatchResponse.FromString,
+                _registered_method=True)
         self.CheckLiveness = channel.unary_unary(
                 '/facelock.inference.FaceInference/CheckLiveness',
                 request_serializer=inference__pb2.LivenessRequest.SerializeToString,
@@ -75,6 +80,13 @@ class FaceInferenceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ExtractEmbeddings(self, request, context):
+        """Extract embeddings for several faces of one image in a single model run
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def CheckLiveness(self, request, context):
         """Check if face is real (liveness detection)
         """
@@ -102,6 +114,11 @@ def add_FaceInferenceServicer_to_server(servicer, server):
                     request_deserializer=inference__pb2.EmbeddingRequest.FromString,
                     response_serializer=inference__pb2.EmbeddingResponse.SerializeToString,
             ),
+            'ExtractEmbeddings': grpc.unary_unary_rpc_method_handler(
+                    servicer.ExtractEmbeddings,
+                    request_deserializer=inference__pb2.EmbeddingBatchRequest.FromString,
+                    response_serializer=inference__pb2.EmbeddingBatchResponse.SerializeToString,
+            ),
             'CheckLiveness': grpc.unary_unary_rpc_method_handler(
                     servicer.CheckLiveness,
                     request_deserializer=inference__pb2.LivenessRequest.FromString,
@@ -178,6 +195,33 @@ class FaceInference(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ExtractEmbeddings(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/facelock.inference.FaceInference/ExtractEmbeddings',
+            inference__pb2.EmbeddingBatchRequest.SerializeToString,
+            inference__pb2.EmbeddingBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def CheckLiveness(request,
             target,
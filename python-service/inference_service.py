@@ -7,7 +7,10 @@ Supports ROCm, DirectML, and CPU execution
 
 import os
 import time
+import asyncio
 import logging
+import queue
+import threading
 from concurrent import futures
 from typing import List, Tuple, Optional
 
@@ -20,6 +23,9 @@ import onnxruntime as ort
 import inference_pb2
 import inference_pb2_grpc
 
+import detection_kernels
+from detection_kernels import decode_scale_jit, nms_jit
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,100 +33,373 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Request decoding and preprocessing run on a small pool of worker threads
+# (--max-concurrency), while each model session is run by a single dedicated
+# thread. Every session gets its own intra-op pool sized for that one thread;
+# the server additionally shares one CPU memory arena between the sessions
+CPU_COUNT = os.cpu_count() or 1
+PREPROCESS_WORKERS = max(1, CPU_COUNT // 2)
+
+# Inferences run on a blank input after loading, so allocator growth and
+# kernel selection don't land on the first request
+WARMUP_RUNS = 2
+
+# Detector inputs kept for reuse; requests in flight beyond this allocate their own
+INPUT_POOL_SIZE = 2 * PREPROCESS_WORKERS
+
+# Detector input resolution; larger JPEGs are decoded downscaled for detection
+DETECTOR_INPUT_SIZE = 640
+
+# Largest request the server accepts: a raw 3840x2160 BGR frame plus headroom
+# for the other fields. gRPC's 4 MiB default rejects even a raw 1080p frame
+MAX_MESSAGE_BYTES = 3840 * 2160 * 3 + (1 << 20)
+
+# IMREAD_REDUCED_COLOR_* flags by downscale factor, largest first
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+_environment_lock = threading.Lock()
+_shared_environment = False
+
+
+# Execution providers in priority order: ROCm > DirectML > CUDA > CPU
+PREFERRED_PROVIDERS = ['ROCMExecutionProvider', 'DmlExecutionProvider',
+                       'CUDAExecutionProvider', 'CPUExecutionProvider']
+
+# Providers of this ONNX Runtime build, resolved once for both models
+PROVIDERS = ([p for p in PREFERRED_PROVIDERS if p in ort.get_available_providers()]
+             or ['CPUExecutionProvider'])
+
+# Device reported by the Health RPC for each provider
+DEVICE_NAMES = {
+    'ROCMExecutionProvider': 'rocm',
+    'DmlExecutionProvider': 'directml',
+    'CUDAExecutionProvider': 'cuda',
+    'CPUExecutionProvider': 'cpu',
+}
+
+
+def init_ort_environment():
+    """Create the process-wide CPU arena used by sessions created afterwards"""
+    global _shared_environment
+    with _environment_lock:
+        if not _shared_environment:
+            # Only errors reach the service log; ORT warnings are noise in production
+            ort.set_default_logger_severity(3)
+            # Optional cap on the shared CPU arena in MiB (0 leaves it unbounded)
+            value = os.environ.get('LINUXHELLO_ARENA_MAX_MB', '0')
+            try:
+                arena_max_mb = int(value)
+                if arena_max_mb < 0:
+                    raise ValueError(value)
+            except ValueError:
+                logger.warning(f"Ignoring invalid LINUXHELLO_ARENA_MAX_MB={value!r}")
+                arena_max_mb = 0
+            cpu_memory = ort.OrtMemoryInfo("Cpu", ort.OrtAllocatorType.ORT_ARENA_ALLOCATOR,
+                                           0, ort.OrtMemType.DEFAULT)
+            # Extend the arena by what is requested instead of doubling it, so the
+            # steady-state footprint tracks the models' actual peak
+            arena_cfg = ort.OrtArenaCfg({'arena_extend_strategy': 1, 'max_mem': arena_max_mb << 20})
+            ort.create_and_register_allocator(cpu_memory, arena_cfg)
+            _shared_environment = True
+
+
+def create_session_options(providers: List[str]) -> ort.SessionOptions:
+    """Session options for the detector and recognizer sessions"""
+    sess_options = ort.SessionOptions()
+    # Each session is run by one dedicated thread, and detecting and embedding
+    # a frame alternate rather than overlap, so each pool may use every core.
+    # The pools are per session rather than ORT's global pools because only
+    # per-session pools can turn spin-waiting off from Python: idle intra-op
+    # threads then sleep between requests instead of burning CPU
+    sess_options.intra_op_num_threads = CPU_COUNT
+    sess_options.inter_op_num_threads = 1
+    sess_options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    if _shared_environment:
+        # Detector and recognizer share the CPU arena instead of each growing their own
+        sess_options.add_session_config_entry("session.use_env_allocators", "1")
+    sess_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    # Smaller work blocks spread an operator's loop more evenly across the
+    # intra-op threads, which cuts tail latency at batch size 1
+    sess_options.add_session_config_entry("session.dynamic_block_base", "4")
+    # Memory patterns preplan allocations for the fixed input shape; DirectML
+    # does not support them
+    sess_options.enable_mem_pattern = providers[0] != 'DmlExecutionProvider'
+    return sess_options
+
+
+def int8_model_path(model_path: str) -> str:
+    """Path of the INT8 variant of a model, as written by `model_tools.py quantize`"""
+    return f"{os.path.splitext(model_path)[0]}.int8.onnx"
+
+
+def fp16_model_path(model_path: str) -> str:
+    """Path of the FP16 variant of a model, as written by `model_tools.py fp16`"""
+    return f"{os.path.splitext(model_path)[0]}.fp16.onnx"
+
+
+def select_model_variant(model_path: str, providers: List[str],
+                         use_int8: bool = False, use_fp16: bool = True) -> str:
+    """Pick the INT8 variant of a model on the CPU provider when requested, and the FP16 one on GPUs"""
+    # INT8 convolutions map to VNNI/AVX2 kernels on CPU; GPUs run FP16 at
+    # up to twice the FP32 rate and with half the memory traffic
+    if providers[0] == 'CPUExecutionProvider':
+        variant = int8_model_path(model_path) if use_int8 else None
+    else:
+        variant = fp16_model_path(model_path) if use_fp16 else None
+    if variant and os.path.exists(variant):
+        return variant
+    return model_path
+
+
+def optimized_model_path(model_path: str, provider: str) -> str:
+    """Path of the cached optimized graph for a model, execution provider and ORT release"""
+    # Optimized graphs may contain provider-specific kernels and contrib ops of
+    # this ORT release, so a provider change or an upgrade starts a new cache
+    tag = provider.replace('ExecutionProvider', '').lower()
+    return f"{os.path.splitext(model_path)[0]}.{tag}.ort{ort.__version__}.opt.onnx"
+
+
+def create_session(model_path: str, providers: List[str], use_int8: bool = False,
+                   use_fp16: bool = True) -> ort.InferenceSession:
+    """
+    Create an inference session, preferring the model's reduced-precision variant.
+    
+    Falls back to the original model when the variant cannot be loaded,
+    e.g. because the provider lacks a kernel for one of its FP16 nodes.
+    """
+    variant = select_model_variant(model_path, providers, use_int8, use_fp16)
+    if variant != model_path:
+        try:
+            session = load_session(variant, providers)
+            logger.info(f"Using {variant}")
+            return session
+        except Exception as e:
+            logger.warning(f"Could not load {variant}, using {model_path}: {e}")
+    
+    return load_session(model_path, providers)
+
+
+def load_session(model_path: str, providers: List[str]) -> ort.InferenceSession:
+    """
+    Create an inference session with all graph optimizations enabled.
+    
+    The first load serializes the graph after the hardware-independent
+    optimizations next to the model; later loads start from it and only
+    apply the layout transforms tuned to this machine's CPU. The cache is
+    ignored once the source model is newer than it.
+    """
+    opt_path = optimized_model_path(model_path, providers[0])
+    
+    def cache_is_fresh() -> bool:
+        return os.path.exists(opt_path) and os.path.getmtime(opt_path) >= os.path.getmtime(model_path)
+    
+    if not cache_is_fresh() and os.access(os.path.dirname(os.path.abspath(opt_path)), os.W_OK):
+        # ORT_ENABLE_ALL output contains NCHWc layouts for the current CPU,
+        # so only the extended optimizations are serialized
+        sess_options = create_session_options(providers)
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        sess_options.optimized_model_filepath = opt_path
+        try:
+            ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
+            logger.info(f"Saved optimized model to {opt_path}")
+        except Exception as e:
+            # Some providers compile nodes that cannot be serialized
+            logger.warning(f"Could not save optimized model {opt_path}: {e}")
+    
+    sess_options = create_session_options(providers)
+    sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if cache_is_fresh():
+        try:
+            session = ort.InferenceSession(opt_path, sess_options=sess_options, providers=providers)
+            logger.info(f"Loaded optimized model {opt_path}")
+            return session
+        except Exception as e:
+            logger.warning(f"Ignoring unusable optimized model {opt_path}: {e}")
+            sess_options = create_session_options(providers)
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    
+    return ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
+
+
+# Target 5-point landmarks of an aligned 112x112 ArcFace input
+ARCFACE_TEMPLATE = np.array([
+    [38.2946, 51.6963],
+    [73.5318, 51.5014],
+    [56.0252, 71.7366],
+    [41.5493, 92.3655],
+    [70.7299, 92.2041]
+], dtype=np.float32)
+
+
+def detect_response(boxes: np.ndarray, scores: np.ndarray,
+                    landmarks: np.ndarray) -> inference_pb2.DetectResponse:
+    """Build a DetectResponse from (N, 4) boxes, (N,) scores and (N, 5, 2) landmarks"""
+    detections = []
+    # One tolist() per array instead of converting element by element
+    for (x1, y1, x2, y2), score, points in zip(boxes.tolist(), scores.tolist(), landmarks.tolist()):
+        detection = inference_pb2.Detection(x1=x1, y1=y1, x2=x2, y2=y2, confidence=score)
+        detection.landmarks.extend(inference_pb2.Landmark(x=x, y=y) for x, y in points)
+        detections.append(detection)
+    return inference_pb2.DetectResponse(detections=detections)
+
+
+# Largest input batch that gets a cached binding. The recognizer's batch size
+# is the face count a client sends, so larger batches run unbound rather
+# than growing the per-shape cache (and device buffers) without limit
+MAX_BOUND_BATCH = 8
+
+
+# OrtValue device names of the GPU execution providers (ROCm builds use 'cuda')
+ORT_DEVICE_TYPES = {
+    'ROCMExecutionProvider': 'cuda',
+    'CUDAExecutionProvider': 'cuda',
+    'DmlExecutionProvider': 'dml',
+}
+
+
+class SessionRunner:
+    """Runs an ONNX Runtime session through per-thread IOBindings with reusable output buffers"""
+    
+    def __init__(self, session: ort.InferenceSession, input_name: str, output_names: List[str]):
+        self.session = session
+        self.input_name = input_name
+        self.output_names = output_names
+        # On GPU providers the input lives in a preallocated device buffer
+        self.device = ORT_DEVICE_TYPES.get(session.get_providers()[0])
+        # gRPC handlers run concurrently, so each thread gets its own binding and buffers
+        self._local = threading.local()
+    
+    def run(self, input_data: np.ndarray) -> List[np.ndarray]:
+        """
+        Run inference on a single input tensor.
+        
+        The returned arrays are reused by the next call with the same input
+        shape on the same thread, so callers must copy anything they keep.
+        """
+        if input_data.shape[0] > MAX_BOUND_BATCH:
+            return self.session.run(self.output_names, {self.input_name: input_data})
+        
+        bindings = getattr(self._local, 'bindings', None)
+        if bindings is None:
+            bindings = self._local.bindings = {}
+        
+        bound = bindings.get(input_data.shape)
+        if bound is None:
+            return self._bind(bindings, input_data)
+        
+        # Outputs land in the preallocated buffers. A CPU input is bound zero-copy;
+        # a device input is refreshed in place with a single host-to-device copy
+        binding, outputs, device_input = bound
+        if device_input is not None:
+            device_input.update_inplace(input_data)
+        else:
+            binding.bind_cpu_input(self.input_name, input_data)
+        self.session.run_with_iobinding(binding)
+        return outputs
+    
+    def _bind(self, bindings: dict, input_data: np.ndarray) -> List[np.ndarray]:
+        """Run once normally to learn output shapes, then bind buffers of those shapes"""
+        outputs = self.session.run(self.output_names, {self.input_name: input_data})
+        
+        binding = self.session.io_binding()
+        buffers = []
+        for name, out in zip(self.output_names, outputs):
+            buf = np.empty_like(out)
+            binding.bind_output(name, 'cpu', 0, buf.dtype, buf.shape, buf.ctypes.data)
+            buffers.append(buf)
+        
+        device_input = None
+        if self.device is not None:
+            try:
+                device_input = ort.OrtValue.ortvalue_from_shape_and_type(
+                    input_data.shape, input_data.dtype, self.device, 0)
+                binding.bind_ortvalue_input(self.input_name, device_input)
+                # Some ROCm/DML builds create device values but cannot copy into
+                # or run from them, so probe the whole path once here
+                device_input.update_inplace(input_data)
+                self.session.run_with_iobinding(binding)
+            except Exception as e:
+                logger.warning(f"Device input binding unavailable, using host input: {e}")
+                self.device = None
+                device_input = None
+        
+        bindings[input_data.shape] = (binding, buffers, device_input)
+        return outputs
+
 
 class FaceDetector:
     """SCRFD face detector"""
     
-    def __init__(self, model_path: str, conf_threshold: float = 0.5, nms_threshold: float = 0.4):
+    def __init__(self, model_path: str, conf_threshold: float = 0.5, nms_threshold: float = 0.4,
+                 use_int8: bool = False, use_fp16: bool = True):
         self.conf_threshold = conf_threshold
         self.nms_threshold = nms_threshold
-        self.input_size = (640, 640)
+        self.input_size = (DETECTOR_INPUT_SIZE, DETECTOR_INPUT_SIZE)
         self.debug_mode = os.environ.get('LINUXHELLO_DEBUG', '').lower() == 'true'
         
         # Create ONNX Runtime session with available providers
-        providers = self._get_available_providers()
+        providers = PROVIDERS
         logger.info(f"Creating face detector with providers: {providers}")
         
-        self.session = ort.InferenceSession(model_path, providers=providers)
+        self.session = create_session(model_path, providers, use_int8, use_fp16)
         self.input_name = self.session.get_inputs()[0].name
+        # Models converted by `model_tools.py nhwc` normalize in-graph and take the BGR canvas as is
+        self.uint8_input = self.session.get_inputs()[0].type == 'tensor(uint8)'
+        # Per-thread letterbox canvas, reused across preprocess() calls
+        self._local = threading.local()
+        # Model inputs may still wait in the batch queue after preprocess() returns,
+        # so they come from a pool that release_input() refills after each run
+        self._free_inputs = queue.SimpleQueue()
+        # Convert to RGB, normalize to [-1, 1] (InsightFace SCRFD standard) and
+        # lay out as NCHW in a single pass
+        self._blob_params = cv2.dnn.Image2BlobParams(scalefactor=(1.0 / 128.0,) * 3,
+                                                     size=self.input_size,
+                                                     mean=(127.5, 127.5, 127.5), swapRB=True)
+        
+        # A symbolic batch dimension means the model accepts batched input
+        self.supports_batching = not isinstance(self.session.get_inputs()[0].shape[0], int)
         
-        # Dynamically classify outputs based on shape to be robust against reordering
-        self.score_names = []
-        self.bbox_names = []
-        self.kps_names = []
-        
-        # Collect outputs and their sizes (number of anchors)
-        scores_with_size = []
-        bboxes_with_size = []
-        kps_with_size = []
-        
-        for out in self.session.get_outputs():
-            shape = out.shape
-            # Handle dynamic batch size (usually 'None' or -1 in index 0)
-            # We look at the last dimension to determine type
-            
-            # Shape patterns for SCRFD:
-            # Score: [N, 1]
-            # Bbox:  [N, 4]
-            # Kps:   [N, 10]
-            
-            cols = shape[-1]
-            # Approximate N based on expected resolution 640x640
-            # N is one of 6400, 1600, 400, 100, 25
-            
-            # Since shape[0] usually contains variable dimension (batch size) in ONNX,
-            # we can't trust it to be an integer. It might be None or "BatchSize".
-            # We rely on columns.
-            
-            if cols == 1:
-                # Score
-                scores_with_size.append(out)
-            elif cols == 4:
-                # Bbox
-                bboxes_with_size.append(out)
-            elif cols == 10:
-                # Kps
-                kps_with_size.append(out)
+        self.output_names = [out.name for out in self.session.get_outputs()]
         
-        # Helper to sort by anchor count descending.
-        # Since we don't know N from shape (it's often flexible), we assume 
-        # that within the ONNX graph, the outputs are ordered by scale or 
-        # we can't easily distinguish them solely by metadata if N is dynamic.
-        # BUT, usually 'BatchSize' * 'H*W' is the shape.
+        self._runner = SessionRunner(self.session, self.input_name, self.output_names)
+        # Output dimensions are often symbolic, so the outputs are classified into
+        # scores, bboxes and keypoints once from a real run, robust against reordering.
+        # The run bypasses the runner: this thread's IOBinding would never be reused
+        self._output_roles = self._find_output_roles()
         
-        # To be safe, we will rely on names or standard ONNX export ordering if shape is strictly dynamic.
-        # However, typically `session.run` returns actual numpy arrays where we CAN check size.
-        # So we should do this sorting at runtime (in detect), OR trust that existing order within groups is correct.
-        # Let's trust the grouping first, then at runtime map them strictly by size.
+        # Anchor grids depend only on the input size, so precompute them for the
+        # standard SCRFD strides with 1 or 2 anchors per position. Keyed by the
+        # number of anchor rows a scale produces, which is unique per combination.
+        self._anchor_cache = {}
+        for stride in (8, 16, 32, 64, 128):
+            for num_anchors in (1, 2):
+                self._add_anchor_scale(stride, num_anchors)
         
-        self.output_names = [out.name for out in self.session.get_outputs()]
+        # Compile the Numba kernels now rather than on the first request
+        detection_kernels.warmup()
         
         logger.info(f"Face detector loaded. Input: {self.input_name}, Outputs: {len(self.output_names)}")
         logger.debug(f"Output names: {self.output_names}")
 
     
-    def _get_available_providers(self) -> List[str]:
-        """Get available execution providers in priority order"""
-        available = ort.get_available_providers()
-        logger.info(f"Available ONNX Runtime providers: {available}")
-        
-        # Priority order: ROCm > DirectML > CUDA > CPU
-        preferred = ['ROCMExecutionProvider', 'DmlExecutionProvider', 
-                    'CUDAExecutionProvider', 'CPUExecutionProvider']
-        
-        providers = [p for p in preferred if p in available]
-        if not providers:
-            providers = ['CPUExecutionProvider']
-        
-        return providers
-    
-    def preprocess(self, image: np.ndarray) -> Tuple[np.ndarray, dict]:
+    def preprocess(self, image: np.ndarray,
+                   original_size: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, dict]:
         """
         Preprocess image for SCRFD model with optimized scaling.
         
         Strategy: Resize to maintain aspect ratio first, then pad to square.
         This keeps faces at maximum resolution in the model input.
         
+        Args:
+            image: BGR image
+            original_size: (width, height) of the full-resolution image when
+                `image` is a downscaled decode of it; detections are then
+                mapped back to the full resolution
+        
         Returns:
             Tuple of (preprocessed_image, transform_info) where transform_info
             contains the padding and scaling information needed to transform
@@ -135,14 +414,26 @@ class FaceDetector:
         new_w = int(w * scale)
         new_h = int(h * scale)
         
-        # Resize image maintaining aspect ratio
-        resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-        
-        # Create square canvas and center the resized image
-        canvas = np.zeros((target_size, target_size, 3), dtype=np.uint8)
+        # Square canvas with the resized image centered in it. A uint8 model takes
+        # the canvas itself as input, so it is drawn straight into a pooled input
+        input_data = self._acquire_input()
+        if self.uint8_input:
+            canvas = input_data[0]
+        else:
+            canvas = getattr(self._local, 'canvas', None)
+            if canvas is None:
+                canvas = self._local.canvas = np.empty((target_size, target_size, 3), dtype=np.uint8)
         y_offset = (target_size - new_h) // 2
         x_offset = (target_size - new_w) // 2
-        canvas[y_offset:y_offset+new_h, x_offset:x_offset+new_w] = resized
+        
+        # Resize maintaining aspect ratio straight into the canvas and clear
+        # only the padding around it
+        cv2.resize(image, (new_w, new_h), dst=canvas[y_offset:y_offset+new_h, x_offset:x_offset+new_w],
+                   interpolation=cv2.INTER_LINEAR)
+        canvas[:y_offset] = 0
+        canvas[y_offset+new_h:] = 0
+        canvas[y_offset:y_offset+new_h, :x_offset] = 0
+        canvas[y_offset:y_offset+new_h, x_offset+new_w:] = 0
         
         # Store transform info for coordinate mapping back
         transform_info = {
@@ -154,22 +445,19 @@ class FaceDetector:
             'resized_width': new_w,
             'resized_height': new_h
         }
+        if original_size is not None:
+            transform_info['original_width'], transform_info['original_height'] = original_size
+            transform_info['scale'] = scale * w / original_size[0]
         
-        # Convert to RGB and normalize to [-1, 1] (InsightFace SCRFD standard)
-        img = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
-        img = (img.astype(np.float32) - 127.5) / 128.0
-        
-        # Transpose to CHW format
-        img = img.transpose(2, 0, 1)
-        
-        # Add batch dimension
-        img = np.expand_dims(img, axis=0)
+        if not self.uint8_input:
+            cv2.dnn.blobFromImageWithParams(canvas, input_data, self._blob_params)
         
         # Log preprocessing details at debug level
-        logger.debug(f"Preprocessing: original={w}x{h} → resized={new_w}x{new_h} → 640x640, "
-                   f"scale={scale:.4f}, padding=({x_offset},{y_offset})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Preprocessing: original={w}x{h} → resized={new_w}x{new_h} → 640x640, "
+                       f"scale={scale:.4f}, padding=({x_offset},{y_offset})")
         
-        return img, transform_info
+        return input_data, transform_info
     
     def _determine_model_topology(self, scores_out):
         """Determine model architecture (strides and anchors per position)"""
@@ -189,140 +477,141 @@ class FaceDetector:
         logger.debug(f"Model topology: {num_scales} scales, strides={strides}, num_anchors={num_anchors}")
         return strides, num_anchors
     
-    def _decode_bbox(self, bbox_row, cx, cy, stride):
-        """Decode bounding box from anchor-relative coordinates"""
-        dx1, dy1, dx2, dy2 = bbox_row
-        x1 = cx - dx1 * stride
-        y1 = cy - dy1 * stride
-        x2 = cx + dx2 * stride
-        y2 = cy + dy2 * stride
-        return x1, y1, x2, y2
-    
-    def _transform_coords_to_original(self, x, y, transform_info, original_w, original_h):
-        """Transform coordinates from 640x640 model space to original image space"""
-        # Remove padding offsets
-        x_resized = x - transform_info['x_offset']
-        y_resized = y - transform_info['y_offset']
-        
-        # Clamp to resized bounds
-        x_resized = max(0, min(x_resized, transform_info['resized_width']))
-        y_resized = max(0, min(y_resized, transform_info['resized_height']))
-        
-        # Scale to original
-        x_orig = x_resized / transform_info['scale']
-        y_orig = y_resized / transform_info['scale']
-        
-        # Clamp to original bounds
-        x_orig = max(0, min(x_orig, original_w))
-        y_orig = max(0, min(y_orig, original_h))
-        
-        return x_orig, y_orig
-    
-    def _decode_landmarks(self, kps_row, cx, cy, stride, transform_info, original_w, original_h):
-        """Decode 5-point facial landmarks"""
-        landmarks = []
-        for j in range(5):
-            kpx = kps_row[j * 2]
-            kpy = kps_row[j * 2 + 1]
-            
-            lx_640 = cx + kpx * stride
-            ly_640 = cy + kpy * stride
-            
-            lx, ly = self._transform_coords_to_original(
-                lx_640, ly_640, transform_info, original_w, original_h
-            )
-            landmarks.append([lx, ly])
-        
-        return landmarks
+    def _add_anchor_scale(self, stride: int, num_anchors: int) -> dict:
+        """Compute and cache the anchor centers (640x640 space) for one scale"""
+        feat_size = self.input_size[0] // stride
+        ys, xs = np.mgrid[:feat_size, :feat_size]
+        centers = (np.stack([xs, ys], axis=-1).reshape(-1, 2).astype(np.float32) + 0.5) * stride
+        if num_anchors > 1:
+            # Anchors sharing a grid position are stored consecutively
+            centers = np.repeat(centers, num_anchors, axis=0)
+        
+        scale = {'centers': centers, 'stride': stride, 'feat_size': feat_size, 'n': len(centers)}
+        self._anchor_cache[len(centers)] = scale
+        return scale
+    
+    def _transform_coords_to_original(self, points, transform_info, original_w, original_h):
+        """Transform (..., 2) points from 640x640 model space to original image space"""
+        offset = np.array([transform_info['x_offset'], transform_info['y_offset']], dtype=np.float32)
+        resized_bounds = np.array([transform_info['resized_width'], transform_info['resized_height']],
+                                  dtype=np.float32)
+        original_bounds = np.array([original_w, original_h], dtype=np.float32)
+        
+        # Remove padding offsets and clamp to resized bounds
+        points = np.clip(points - offset, 0, resized_bounds)
+        
+        # Scale to original and clamp to original bounds
+        return np.minimum(points / np.float32(transform_info['scale']), original_bounds)
     
     def _process_scale_detections(self, scale_idx, scores_out, bboxes_out, kps_out, 
-                                   strides, num_anchors, transform_info, 
-                                   original_w, original_h, conf_threshold):
-        """Process detections for a single scale"""
+                                   transform_info, original_w, original_h, conf_threshold):
+        """
+        Decode the detections of a single scale.
+        
+        Returns:
+            Tuple of (boxes (K, 4), scores (K,), landmarks (K, 5, 2)) float32
+            arrays in original image coordinates
+        """
         curr_size, score_tensor = scores_out[scale_idx]
         _, bboxes = bboxes_out[scale_idx]
         _, keypoints = kps_out[scale_idx]
         
-        stride = strides[scale_idx]
-        feat_size = 640 // stride
-        
-        logger.debug(f"Processing scale {scale_idx}: anchors={curr_size}, "
-                   f"feat_size={feat_size}, stride={stride}, num_anchors={num_anchors}")
+        # Stride and grid come from the anchor count alone
+        anchor_scale = self._anchor_cache.get(curr_size)
+        if anchor_scale is None:
+            # Non-standard layout: derive the grid from the model topology
+            strides, num_anchors = self._determine_model_topology(scores_out)
+            anchor_scale = self._add_anchor_scale(strides[scale_idx], num_anchors)
+        stride = anchor_scale['stride']
+        feat_size = anchor_scale['feat_size']
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Processing scale {scale_idx}: anchors={curr_size}, "
+                       f"feat_size={feat_size}, stride={stride}")
 
         scores = score_tensor.reshape(-1)
-        keep_indices = np.nonzero(scores >= conf_threshold)[0]
-        
-        detections = []
-        for i in keep_indices:
-            score = float(scores[i])
-            
-            # Calculate grid position
-            pos_idx = i // num_anchors
-            h_idx = pos_idx // feat_size
-            w_idx = pos_idx % feat_size
-            
-            # Center point in 640x640 space
-            cx = (w_idx + 0.5) * stride
-            cy = (h_idx + 0.5) * stride
+        if decode_scale_jit is not None:
+            # float32 scalars keep the compiled arithmetic in single precision
+            f32 = np.float32
+            boxes, kept_scores, landmarks = decode_scale_jit(
+                scores, bboxes, keypoints, anchor_scale['centers'], f32(stride),
+                f32(conf_threshold), f32(transform_info['x_offset']),
+                f32(transform_info['y_offset']), f32(transform_info['resized_width']),
+                f32(transform_info['resized_height']), f32(transform_info['scale']),
+                f32(original_w), f32(original_h))
+        else:
+            keep_indices = np.nonzero(scores >= conf_threshold)[0]
             
-            # Decode bbox
-            x1_640, y1_640, x2_640, y2_640 = self._decode_bbox(
-                bboxes[i], cx, cy, stride
-            )
+            # Decode bboxes and landmarks for all kept anchors at once (640x640 space)
+            centers = anchor_scale['centers'][keep_indices]
+            deltas = bboxes[keep_indices] * stride
+            top_left = centers - deltas[:, :2]
+            bottom_right = centers + deltas[:, 2:]
+            landmarks = centers[:, None, :] + keypoints[keep_indices].reshape(-1, 5, 2) * stride
             
             # Transform to original coordinates
-            x1, y1 = self._transform_coords_to_original(
-                x1_640, y1_640, transform_info, original_w, original_h
-            )
-            x2, y2 = self._transform_coords_to_original(
-                x2_640, y2_640, transform_info, original_w, original_h
-            )
-            
-            # Decode landmarks
-            landmarks = self._decode_landmarks(
-                keypoints[i], cx, cy, stride, 
-                transform_info, original_w, original_h
-            )
-            
-            detections.append({
-                'bbox': [x1, y1, x2, y2],
-                'confidence': score,
-                'landmarks': landmarks
-            })
-        
-        return detections
+            boxes = np.concatenate([
+                self._transform_coords_to_original(top_left, transform_info, original_w, original_h),
+                self._transform_coords_to_original(bottom_right, transform_info, original_w, original_h),
+            ], axis=1)
+            landmarks = self._transform_coords_to_original(landmarks, transform_info, original_w, original_h)
+            kept_scores = scores[keep_indices]
+        
+        return boxes, kept_scores, landmarks
     
-    def _classify_and_sort_outputs(self, outputs_list):
-        """Classify model outputs into scores, bboxes, and keypoints"""
-        scores_out = []
-        bboxes_out = []
-        kps_out = []
+    @staticmethod
+    def _as_rows(arr: np.ndarray) -> np.ndarray:
+        """View one image's output as a 2D float32 (anchors, values) array"""
+        # Decode in float32 whatever the model's output precision
+        arr = arr.astype(np.float32, copy=False)
+        
+        # Flatten batch dim if present
+        if arr.ndim == 3 and arr.shape[0] == 1:
+            arr = arr[0]
+        
+        # Ensure 2D
+        if arr.ndim < 2 and len(arr.shape) == 1:
+            arr = arr.reshape(-1, 1)
+        return arr
+    
+    def _blank_input(self) -> np.ndarray:
+        """A black single-image model input"""
+        image = np.zeros((self.input_size[1], self.input_size[0], 3), dtype=np.uint8)
+        return self.preprocess(image)[0]
+    
+    def _find_output_roles(self) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Classify the model outputs once into scores, bboxes, and keypoints.
         
-        for arr in outputs_list:
-            # Flatten batch dim if present
-            if arr.ndim == 3 and arr.shape[0] == 1:
-                arr = arr[0]
-            
-            # Ensure 2D
-            if arr.ndim < 2 and len(arr.shape) == 1:
-                arr = arr.reshape(-1, 1)
-
+        Returns the output indices of each group, largest scale (most anchors) first.
+        """
+        scores_idx = []
+        bboxes_idx = []
+        kps_idx = []
+        
+        outputs = self.session.run(self.output_names, {self.input_name: self._blank_input()})
+        outputs = [self._as_rows(arr) for arr in outputs]
+        for idx, arr in enumerate(outputs):
             cols = arr.shape[-1]
-            rows = arr.shape[0]
-            
             if cols == 1:
-                scores_out.append((rows, arr))
+                scores_idx.append(idx)
             elif cols == 4:
-                bboxes_out.append((rows, arr))
+                bboxes_idx.append(idx)
             elif cols == 10:
-                kps_out.append((rows, arr))
+                kps_idx.append(idx)
         
-        # Sort by number of anchors descending
-        scores_out.sort(key=lambda x: x[0], reverse=True)
-        bboxes_out.sort(key=lambda x: x[0], reverse=True)
-        kps_out.sort(key=lambda x: x[0], reverse=True)
+        # Sort by number of anchors descending (stable for equal sizes)
+        for group in (scores_idx, bboxes_idx, kps_idx):
+            group.sort(key=lambda i: outputs[i].shape[0], reverse=True)
         
-        return scores_out, bboxes_out, kps_out
+        return scores_idx, bboxes_idx, kps_idx
+    
+    def _classify_and_sort_outputs(self, outputs_list):
+        """Group model outputs into scores, bboxes, and keypoints using the cached roles"""
+        return tuple(
+            [(arr.shape[0], arr) for arr in (self._as_rows(outputs_list[i]) for i in group)]
+            for group in self._output_roles
+        )
 
     def detect(self, image: np.ndarray, conf_threshold: Optional[float] = None,
                nms_threshold: Optional[float] = None) -> List[dict]:
@@ -332,20 +621,93 @@ class FaceDetector:
         Returns:
             List of detections with keys: bbox, confidence, landmarks
         """
+        # Preprocess
+        input_data, transform_info = self.preprocess(image)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Transform info: {transform_info}")
+        
+        # Run inference
+        try:
+            outputs_list = self.infer(input_data)
+        finally:
+            self.release_input(input_data)
+        
+        return self.postprocess(outputs_list, transform_info, conf_threshold, nms_threshold)
+    
+    def _acquire_input(self) -> np.ndarray:
+        """Take a model input buffer from the pool, allocating one if it is empty"""
+        try:
+            return self._free_inputs.get_nowait()
+        except queue.Empty:
+            size = self.input_size[0]
+            if self.uint8_input:
+                return np.empty((1, size, size, 3), dtype=np.uint8)
+            return np.empty((1, 3, size, size), dtype=np.float32)
+    
+    def release_input(self, input_data: np.ndarray):
+        """Return an input from preprocess() to the pool once the model has consumed it"""
+        if self._free_inputs.qsize() < INPUT_POOL_SIZE:
+            self._free_inputs.put(input_data)
+    
+    def infer(self, input_data: np.ndarray) -> List[np.ndarray]:
+        """Run the model on a preprocessed (B, 3, 640, 640) batch, or (B, 640, 640, 3) uint8"""
+        return self._runner.run(input_data)
+    
+    @staticmethod
+    def split_batch_outputs(outputs_list: List[np.ndarray], batch_size: int) -> List[List[np.ndarray]]:
+        """Split the outputs of a batched run into per-image output lists"""
+        per_image = [[] for _ in range(batch_size)]
+        for arr in outputs_list:
+            if arr.ndim == 3:
+                # [B, N, C]: keep a batch dim of 1, which postprocess strips
+                parts = [arr[i:i + 1] for i in range(batch_size)]
+            else:
+                # [B*N, C]: some exports fold the batch into the anchor dim
+                parts = np.split(arr, batch_size)
+            for outputs, part in zip(per_image, parts):
+                outputs.append(part)
+        return per_image
+    
+    def postprocess(self, outputs_list: List[np.ndarray], transform_info: dict,
+                    conf_threshold: Optional[float] = None,
+                    nms_threshold: Optional[float] = None) -> List[dict]:
+        """Decode the raw outputs for a single image into detections"""
+        detections = self.as_detections(*self.decode(outputs_list, transform_info,
+                                                     conf_threshold, nms_threshold))
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Found {len(detections)} face(s) after NMS")
+            if len(detections) > 0:
+                logger.debug(f"First detection: bbox={detections[0]['bbox']}, "
+                           f"conf={detections[0]['confidence']:.3f}")
+        
+        return detections
+    
+    @staticmethod
+    def as_detections(boxes: np.ndarray, scores: np.ndarray, landmarks: np.ndarray) -> List[dict]:
+        """Convert decoded arrays into detections with keys: bbox, confidence, landmarks"""
+        return [
+            {'bbox': bbox, 'confidence': score, 'landmarks': lms}
+            for bbox, score, lms in zip(boxes.tolist(), scores.tolist(), landmarks.tolist())
+        ]
+    
+    def decode(self, outputs_list: List[np.ndarray], transform_info: dict,
+               conf_threshold: Optional[float] = None,
+               nms_threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode the raw outputs for a single image.
+        
+        Returns:
+            Tuple of (N, 4) boxes, (N,) scores and (N, 5, 2) landmarks in
+            original image coordinates, best first
+        """
         if conf_threshold is None:
             conf_threshold = self.conf_threshold
         if nms_threshold is None:
             nms_threshold = self.nms_threshold
         
-        original_h, original_w = image.shape[:2]
-        logger.debug(f"Detect called with image size: {original_w}x{original_h}")
-        
-        # Preprocess
-        input_data, transform_info = self.preprocess(image)
-        logger.debug(f"Transform info: {transform_info}")
-        
-        # Run inference
-        outputs_list = self.session.run(self.output_names, {self.input_name: input_data})
+        original_w = transform_info['original_width']
+        original_h = transform_info['original_height']
         
         # Classify and sort outputs
         scores_out, bboxes_out, kps_out = self._classify_and_sort_outputs(outputs_list)
@@ -354,182 +716,325 @@ class FaceDetector:
         if not (len(scores_out) == len(bboxes_out) == len(kps_out)):
             logger.error(f"Output count mismatch: scores={len(scores_out)}, "
                        f"bboxes={len(bboxes_out)}, kps={len(kps_out)}")
-            return []
+            return self._no_detections()
 
-        # Determine model topology
-        strides, num_anchors = self._determine_model_topology(scores_out)
+        if not scores_out:
+            logger.error("No score outputs found in detector outputs")
+            return self._no_detections()
         
         # Process each scale
-        detections = []
         try:
-            for scale_idx in range(len(scores_out)):
-                scale_dets = self._process_scale_detections(
+            per_scale = [
+                self._process_scale_detections(
                     scale_idx, scores_out, bboxes_out, kps_out,
-                    strides, num_anchors, transform_info,
-                    original_w, original_h, conf_threshold
+                    transform_info, original_w, original_h, conf_threshold
                 )
-                detections.extend(scale_dets)
+                for scale_idx in range(len(scores_out))
+            ]
         except Exception as e:
             import traceback
             traceback.print_exc()
             logger.error(f"Error parsing detections: {e}")
             raise e
+        boxes, scores, landmarks = (np.concatenate(arrays) for arrays in zip(*per_scale))
         
         # Apply NMS
-        detections = self.nms(detections, nms_threshold)
-        
-        logger.debug(f"Found {len(detections)} face(s) after NMS")
-        if len(detections) > 0:
-            logger.info(f"First detection: bbox={detections[0]['bbox']}, "
-                      f"conf={detections[0]['confidence']:.3f}")
-        
-        return detections
+        keep = self.nms(boxes, scores, nms_threshold)
+        return boxes[keep], scores[keep], landmarks[keep]
     
     @staticmethod
-    def nms(detections: List[dict], threshold: float) -> List[dict]:
-        """Non-maximum suppression"""
-        if len(detections) == 0:
-            return []
+    def _no_detections() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Empty result of decode()"""
+        return (np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32),
+                np.zeros((0, 5, 2), dtype=np.float32))
+    
+    @staticmethod
+    def nms(boxes: np.ndarray, scores: np.ndarray, threshold: float) -> np.ndarray:
+        """Non-maximum suppression over (N, 4) boxes; returns kept indices, best first"""
+        if nms_jit is not None:
+            return nms_jit(boxes, scores, np.float32(threshold))
         
-        # Sort by confidence
-        detections = sorted(detections, key=lambda x: x['confidence'], reverse=True)
+        x1, y1, x2, y2 = boxes.T
+        areas = (x2 - x1) * (y2 - y1)
+        
+        # Sort by confidence (stable, so ties keep detection order)
+        order = np.argsort(-scores, kind='stable')
         
         keep = []
-        while detections:
-            current = detections.pop(0)
-            keep.append(current)
+        while order.size > 0:
+            i = order[0]
+            keep.append(i)
+            rest = order[1:]
+            
+            # IoU of the current box against all remaining boxes
+            inter_w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+            inter_h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+            intersection = inter_w * inter_h
+            union = areas[i] + areas[rest] - intersection
+            overlap = np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
             
             # Filter overlapping boxes
-            detections = [
-                d for d in detections
-                if FaceDetector.iou(current['bbox'], d['bbox']) < threshold
-            ]
+            order = rest[overlap < threshold]
         
-        return keep
+        return np.array(keep, dtype=np.intp)
+
+
+class BatchedDetector:
+    """
+    Dynamic batching front-end for FaceDetector.
     
-    @staticmethod
-    def iou(box1: List[float], box2: List[float]) -> float:
-        """Calculate IoU between two boxes"""
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
-        
-        # Intersection
-        x1 = max(x1_1, x1_2)
-        y1 = max(y1_1, y1_2)
-        x2 = min(x2_1, x2_2)
-        y2 = min(y2_1, y2_2)
+    Concurrent detect() calls are preprocessed on their own threads, queued,
+    and run through the model together by a single worker thread: it waits up
+    to max_wait_ms after the first queued request for up to max_batch requests,
+    runs one batched inference and hands each caller its own detections.
+    With max_batch=1 it simply gives the model a dedicated thread.
+    """
+    
+    def __init__(self, detector: FaceDetector, max_batch: int = 8, max_wait_ms: float = 5.0):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        
+        self._worker = threading.Thread(target=self._run, name="detector-batcher", daemon=True)
+        self._worker.start()
+        self.warmup()
+        
+        if max_batch > 1:
+            logger.info(f"Detector batching enabled: max_batch={max_batch}, max_wait={max_wait_ms}ms")
+    
+    def warmup(self, runs: int = WARMUP_RUNS):
+        """
+        Run the full detection pipeline on a blank image.
         
-        if x2 <= x1 or y2 <= y1:
-            return 0.0
+        The runs go through the worker thread, whose IOBinding and device input
+        are the ones requests use.
+        """
+        image = np.zeros((self.detector.input_size[1], self.detector.input_size[0], 3), dtype=np.uint8)
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.submit(image).result()
+        if runs:
+            logger.info(f"Face detector warmed up ({runs} runs, last "
+                        f"{(time.perf_counter() - start) * 1000:.1f} ms)")
+    
+    def submit(self, image: np.ndarray, conf_threshold: Optional[float] = None,
+               nms_threshold: Optional[float] = None,
+               original_size: Optional[Tuple[int, int]] = None) -> futures.Future:
+        """
+        Preprocess image on the calling thread and queue it for detection.
         
-        intersection = (x2 - x1) * (y2 - y1)
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
+        The future resolves to the (boxes, scores, landmarks) arrays of
+        FaceDetector.decode().
+        """
+        input_data, transform_info = self.detector.preprocess(image, original_size)
         
-        return intersection / union if union > 0 else 0.0
+        future = futures.Future()
+        self._queue.put((input_data, transform_info, conf_threshold, nms_threshold, future))
+        return future
+    
+    def detect(self, image: np.ndarray, conf_threshold: Optional[float] = None,
+               nms_threshold: Optional[float] = None) -> List[dict]:
+        """Detect faces in image, blocking until its batch has been processed"""
+        return self.detector.as_detections(*self.submit(image, conf_threshold, nms_threshold).result())
+    
+    def _run(self):
+        """Worker loop: collect a batch, run it, repeat"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._process_batch(batch)
+    
+    def _process_batch(self, batch):
+        """Run one batched inference and resolve the futures of its requests"""
+        try:
+            if len(batch) == 1:
+                input_data = batch[0][0]
+            else:
+                input_data = np.concatenate([item[0] for item in batch])
+            outputs_list = self.detector.infer(input_data)
+            per_image = self.detector.split_batch_outputs(outputs_list, len(batch))
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} request(s): {e}")
+            for item in batch:
+                item[-1].set_exception(e)
+            return
+        finally:
+            for item in batch:
+                self.detector.release_input(item[0])
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Ran detector batch of {len(batch)}")
+        for (_, transform_info, conf_threshold, nms_threshold, future), outputs in zip(batch, per_image):
+            try:
+                future.set_result(self.detector.decode(
+                    outputs, transform_info, conf_threshold, nms_threshold
+                ))
+            except Exception as e:
+                future.set_exception(e)
 
 
 class FaceRecognizer:
     """ArcFace face recognizer"""
     
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, use_int8: bool = False, use_fp16: bool = True):
         self.input_size = (112, 112)
         
         # Create ONNX Runtime session
-        providers = self._get_available_providers()
+        providers = PROVIDERS
         logger.info(f"Creating face recognizer with providers: {providers}")
         
-        self.session = ort.InferenceSession(model_path, providers=providers)
+        self.session = create_session(model_path, providers, use_int8, use_fp16)
         self.input_name = self.session.get_inputs()[0].name
         self.output_name = self.session.get_outputs()[0].name
+        self.uint8_input = self.session.get_inputs()[0].type == 'tensor(uint8)'
+        # A symbolic batch dimension means several faces can share one run
+        self.supports_batching = not isinstance(self.session.get_inputs()[0].shape[0], int)
+        self._runner = SessionRunner(self.session, self.input_name, [self.output_name])
         
         logger.info("Face recognizer loaded")
     
-    def _get_available_providers(self) -> List[str]:
-        """Get available execution providers"""
-        available = ort.get_available_providers()
-        preferred = ['ROCMExecutionProvider', 'DmlExecutionProvider',
-                    'CUDAExecutionProvider', 'CPUExecutionProvider']
-        providers = [p for p in preferred if p in available]
-        if not providers:
-            providers = ['CPUExecutionProvider']
-        return providers
+    def warmup(self, runs: int = WARMUP_RUNS):
+        """Run the model on a blank face; call it on the thread that will run inference"""
+        blob = self.preprocess(np.zeros((self.input_size[1], self.input_size[0], 3), dtype=np.uint8),
+                               ARCFACE_TEMPLATE)
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.infer(blob)
+        if runs:
+            logger.info(f"Face recognizer warmed up ({runs} runs, last "
+                        f"{(time.perf_counter() - start) * 1000:.1f} ms)")
     
     def align_face(self, image: np.ndarray, landmarks: List[List[float]]) -> np.ndarray:
         """Align face using 5-point landmarks"""
-        # Target landmarks for 112x112 image
-        target_landmarks = np.array([
-            [38.2946, 51.6963],
-            [73.5318, 51.5014],
-            [56.0252, 71.7366],
-            [41.5493, 92.3655],
-            [70.7299, 92.2041]
-        ], dtype=np.float32)
-        
         src_landmarks = np.array(landmarks, dtype=np.float32)
         
         # Compute similarity transform
-        tform = cv2.estimateAffinePartial2D(src_landmarks, target_landmarks)[0]
+        tform = cv2.estimateAffinePartial2D(src_landmarks, ARCFACE_TEMPLATE)[0]
         
-        # Warp image
-        aligned = cv2.warpAffine(image, tform, self.input_size, 
-                                borderValue=0.0)
+        # Warp image straight to the 112x112 input; color conversion and scaling
+        # happen together in blobFromImage, so the crop is written only once
+        aligned = cv2.warpAffine(image, tform, self.input_size, flags=cv2.INTER_LINEAR,
+                                 borderMode=cv2.BORDER_CONSTANT, borderValue=0.0)
         
         return aligned
     
+    def preprocess(self, image: np.ndarray, landmarks: List[List[float]]) -> np.ndarray:
+        """Align the face and build the (1, 3, 112, 112) model input, or (1, 112, 112, 3) uint8"""
+        return self.preprocess_batch(image, [landmarks])
+    
+    def preprocess_batch(self, image: np.ndarray, landmarks_list: List[List[List[float]]]) -> np.ndarray:
+        """Align several faces of one image into a single (N, 3, 112, 112) model input"""
+        # Align faces
+        aligned = [self.align_face(image, landmarks) for landmarks in landmarks_list]
+        if self.uint8_input:
+            return np.stack(aligned)
+        
+        # Preprocess (BGR->RGB, scale to [0, 1], NCHW) in a single pass
+        return cv2.dnn.blobFromImages(aligned, scalefactor=1.0 / 255.0, size=self.input_size,
+                                      swapRB=True, crop=False)
+    
     def extract_embedding(self, image: np.ndarray, landmarks: List[List[float]]) -> np.ndarray:
         """Extract face embedding"""
-        # Align face
-        aligned = self.align_face(image, landmarks)
-        
-        # Preprocess
-        aligned = cv2.cvtColor(aligned, cv2.COLOR_BGR2RGB)
-        aligned = aligned.astype(np.float32) / 255.0
-        aligned = aligned.transpose(2, 0, 1)
-        aligned = np.expand_dims(aligned, axis=0)
-        
-        # Run inference
-        embedding = self.session.run([self.output_name], {self.input_name: aligned})[0]
+        return self.infer(self.preprocess(image, landmarks))[0]
+    
+    def extract_embeddings(self, image: np.ndarray, landmarks_list: List[List[List[float]]]) -> np.ndarray:
+        """Extract the embeddings of several faces in one image as an (N, D) array"""
+        return self.infer(self.preprocess_batch(image, landmarks_list))
+    
+    def infer(self, blob: np.ndarray) -> np.ndarray:
+        """Run the model on preprocessed faces and return their normalized (N, D) embeddings"""
+        if len(blob) == 1 or self.supports_batching:
+            embeddings = self._runner.run(blob)[0]
+        else:
+            # Fixed batch size of 1: one run per face, copied out of the reused output buffer
+            embeddings = np.concatenate([self._runner.run(blob[i:i + 1])[0].copy() for i in range(len(blob))])
         
-        # Normalize
-        embedding = embedding.flatten()
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
+        # Normalize (astype copies out of the runner's reused buffer)
+        embeddings = embeddings.reshape(len(blob), -1).astype(np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
         
-        return embedding
+        return embeddings
 
 
 class InferenceServicer(inference_pb2_grpc.FaceInferenceServicer):
     """gRPC servicer implementation"""
     
-    def __init__(self, detector_path: str, recognizer_path: str):
-        self.detector = FaceDetector(detector_path)
-        self.recognizer = FaceRecognizer(recognizer_path)
+    def __init__(self, detector_path: str, recognizer_path: str,
+                 batch_size: int = 1, batch_wait_ms: float = 5.0,
+                 max_concurrency: int = PREPROCESS_WORKERS,
+                 detector_int8: bool = False, recognizer_int8: bool = False, use_fp16: bool = True):
+        detector = FaceDetector(detector_path, use_int8=detector_int8, use_fp16=use_fp16)
+        if batch_size > 1 and not detector.supports_batching:
+            logger.warning("Detector model has a fixed batch size, batching disabled")
+            batch_size = 1
+        # Model runs happen on dedicated threads so Python preprocessing of other
+        # requests never competes with them for the GIL between ORT calls
+        self.detector = BatchedDetector(detector, batch_size, batch_wait_ms)
+        # The recognizer is loaded on first use; still fail fast on a bad path
+        if not os.path.exists(recognizer_path):
+            raise FileNotFoundError(f"Recognizer model not found: {recognizer_path}")
+        self._recognizer_path = recognizer_path
+        self._recognizer_int8 = recognizer_int8
+        self._use_fp16 = use_fp16
+        self._recognizer = None
+        self._recognizer_lock = threading.Lock()
         self.version = "1.0.0"
         
+        # Decoding and preprocessing run here, off the event loop
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_concurrency,
+                                                    thread_name_prefix="preprocess")
+        self._recognizer_executor = futures.ThreadPoolExecutor(max_workers=1,
+                                                               thread_name_prefix="recognizer")
+        
         # Get device info
-        providers = ort.get_available_providers()
-        if 'ROCMExecutionProvider' in providers:
-            self.device = "rocm"
-        elif 'DmlExecutionProvider' in providers:
-            self.device = "directml"
-        elif 'CUDAExecutionProvider' in providers:
-            self.device = "cuda"
-        else:
-            self.device = "cpu"
+        self.device = DEVICE_NAMES[PROVIDERS[0]]
         
         logger.info(f"Inference service initialized on device: {self.device}")
     
+    @property
+    def recognizer(self) -> FaceRecognizer:
+        """Face recognizer, created and warmed up on first access"""
+        if self._recognizer is None:
+            with self._recognizer_lock:
+                if self._recognizer is None:
+                    recognizer = FaceRecognizer(self._recognizer_path, self._recognizer_int8,
+                                                self._use_fp16)
+                    # Warm up on the recognizer thread, whose IOBinding requests use
+                    self._recognizer_executor.submit(recognizer.warmup).result()
+                    self._recognizer = recognizer
+        return self._recognizer
+    
+    async def preload_recognizer(self):
+        """Load and warm up the recognizer in the background"""
+        try:
+            await self._run_in_executor(lambda: self.recognizer)
+        except Exception as e:
+            logger.error(f"Failed to load face recognizer: {e}", exc_info=True)
+    
     def _decode_image(self, image_msg: inference_pb2.Image) -> np.ndarray:
         """Decode image from protobuf message"""
         if image_msg.format in ["jpeg", "png"]:
             # Decode from compressed format
             nparr = np.frombuffer(image_msg.data, np.uint8)
             img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        elif image_msg.format == "bgr":
+            # Raw BGR pixels are OpenCV's native layout: no decode, conversion or copy
+            img = np.frombuffer(image_msg.data, dtype=np.uint8)
+            img = img.reshape((image_msg.height, image_msg.width, 3))
         else:
-            # Raw pixel data
+            # Raw RGB/gray pixel data; clients that can should send "bgr" instead,
+            # which skips this conversion
             img = np.frombuffer(image_msg.data, dtype=np.uint8)
             img = img.reshape((image_msg.height, image_msg.width, image_msg.channels))
             if image_msg.channels == 3:
@@ -537,39 +1042,77 @@ class InferenceServicer(inference_pb2_grpc.FaceInferenceServicer):
         
         return img
     
-    def DetectFaces(self, request, context):
+    def _decode_for_detection(self, image_msg: inference_pb2.Image) -> Tuple[np.ndarray, Optional[Tuple[int, int]]]:
+        """
+        Decode image for detection, letting libjpeg downscale large JPEGs.
+        
+        The detector only sees a 640x640 input, so a JPEG at least twice that
+        size is decoded at 1/2, 1/4 or 1/8 resolution (IMREAD_REDUCED_COLOR_*),
+        which skips most of the IDCT and the later resize.
+        
+        Returns:
+            Tuple of (image, original_size) where original_size is the
+            declared (width, height) when the image was reduced, else None
+        """
+        width, height = image_msg.width, image_msg.height
+        if image_msg.format == "jpeg" and width > 0 and height > 0:
+            longest = max(width, height)
+            for factor, flag in REDUCED_DECODE_FLAGS:
+                if longest // factor < DETECTOR_INPUT_SIZE:
+                    continue
+                img = cv2.imdecode(np.frombuffer(image_msg.data, np.uint8), flag)
+                # Only trust the declared size if the decoded image matches it
+                if img is not None and img.shape[:2] == (-(-height // factor), -(-width // factor)):
+                    return img, (width, height)
+                break
+        
+        return self._decode_image(image_msg), None
+    
+    async def _run_in_executor(self, func, *args):
+        """Run a blocking function on the preprocessing thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    def _submit_detect(self, request) -> futures.Future:
+        """Decode and preprocess the request image, then queue it on the detector thread"""
+        # Decode image
+        image, original_size = self._decode_for_detection(request.image)
+        
+        # Detect faces
+        conf_threshold = request.confidence_threshold if request.confidence_threshold > 0 else None
+        nms_threshold = request.nms_threshold if request.nms_threshold > 0 else None
+        
+        return self.detector.submit(image, conf_threshold, nms_threshold, original_size)
+    
+    def _prepare_embeddings(self, image_msg: inference_pb2.Image, faces) -> np.ndarray:
+        """Decode the image and build the aligned recognizer input for each face (blocking)"""
+        # Decode image
+        image = self._decode_image(image_msg)
+        
+        # Extract landmarks from face detections
+        landmarks_list = [[[lm.x, lm.y] for lm in face.landmarks] for face in faces]
+        
+        return self.recognizer.preprocess_batch(image, landmarks_list)
+    
+    async def _embed(self, image_msg: inference_pb2.Image, faces) -> np.ndarray:
+        """Embed the faces of one image: alignment on the pool, one model run on the recognizer thread"""
+        blob = await self._run_in_executor(self._prepare_embeddings, image_msg, faces)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._recognizer_executor, self.recognizer.infer, blob)
+    
+    async def DetectFaces(self, request, context):
         """Detect faces in image"""
         try:
             start_time = time.time()
             
-            # Decode image
-            image = self._decode_image(request.image)
-            
-            # Detect faces
-            conf_threshold = request.confidence_threshold if request.confidence_threshold > 0 else None
-            nms_threshold = request.nms_threshold if request.nms_threshold > 0 else None
-            
-            detections = self.detector.detect(image, conf_threshold, nms_threshold)
+            future = await self._run_in_executor(self._submit_detect, request)
+            boxes, scores, landmarks = await asyncio.wrap_future(future)
             
             # Convert to protobuf
-            pb_detections = []
-            for det in detections:
-                x1, y1, x2, y2 = det['bbox']
-                landmarks = [inference_pb2.Landmark(x=lm[0], y=lm[1]) for lm in det['landmarks']]
-                
-                pb_det = inference_pb2.Detection(
-                    x1=x1, y1=y1, x2=x2, y2=y2,
-                    confidence=det['confidence'],
-                    landmarks=landmarks
-                )
-                pb_detections.append(pb_det)
+            response = detect_response(boxes, scores, landmarks)
+            response.inference_time_ms = int((time.time() - start_time) * 1000)
             
-            inference_time = int((time.time() - start_time) * 1000)
-            
-            return inference_pb2.DetectResponse(
-                detections=pb_detections,
-                inference_time_ms=inference_time
-            )
+            return response
             
         except Exception as e:
             logger.error(f"Error in DetectFaces: {e}", exc_info=True)
@@ -577,24 +1120,17 @@ class InferenceServicer(inference_pb2_grpc.FaceInferenceServicer):
             context.set_details(str(e))
             return inference_pb2.DetectResponse()
     
-    def ExtractEmbedding(self, request, context):
+    async def ExtractEmbedding(self, request, context):
         """Extract face embedding"""
         try:
             start_time = time.time()
             
-            # Decode image
-            image = self._decode_image(request.image)
-            
-            # Extract landmarks from face detection
-            landmarks = [[lm.x, lm.y] for lm in request.face.landmarks]
-            
-            # Extract embedding
-            embedding = self.recognizer.extract_embedding(image, landmarks)
+            embeddings = await self._embed(request.image, [request.face])
             
             inference_time = int((time.time() - start_time) * 1000)
             
             return inference_pb2.EmbeddingResponse(
-                embedding=inference_pb2.Embedding(values=embedding.tolist()),
+                embedding=inference_pb2.Embedding(values=embeddings[0].tolist()),
                 inference_time_ms=inference_time
             )
             
@@ -604,7 +1140,30 @@ class InferenceServicer(inference_pb2_grpc.FaceInferenceServicer):
             context.set_details(str(e))
             return inference_pb2.EmbeddingResponse()
     
-    def CheckLiveness(self, request, context):
+    async def ExtractEmbeddings(self, request, context):
+        """Extract the embeddings of several faces in one image with a single model run"""
+        try:
+            start_time = time.time()
+            
+            if request.faces:
+                embeddings = await self._embed(request.image, request.faces)
+            else:
+                embeddings = []
+            
+            inference_time = int((time.time() - start_time) * 1000)
+            
+            return inference_pb2.EmbeddingBatchResponse(
+                embeddings=[inference_pb2.Embedding(values=embedding.tolist()) for embedding in embeddings],
+                inference_time_ms=inference_time
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in ExtractEmbeddings: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return inference_pb2.EmbeddingBatchResponse()
+    
+    async def CheckLiveness(self, request, context):
         """Check face liveness using multi-stage approach
         
         Strategy:
@@ -637,24 +1196,38 @@ class InferenceServicer(inference_pb2_grpc.FaceInferenceServicer):
             context.set_details(str(e))
             return inference_pb2.LivenessResponse()
     
-    def Health(self, request, context):
+    async def Health(self, request, context):
         """Health check"""
+        models_loaded = ["scrfd_face_det_10g"]
+        # The recognizer is loaded lazily, so it is only reported once it exists
+        if self._recognizer is not None:
+            models_loaded.append("arcface_r50")
         return inference_pb2.HealthResponse(
             healthy=True,
             version=self.version,
             device=self.device,
-            models_loaded=["scrfd_face_det_10g", "arcface_r50"]
+            models_loaded=models_loaded
         )
 
 
-def serve(host: str = "localhost", port: int = 50051,
-          detector_path: str = "../models/det_10g.onnx",
-          recognizer_path: str = "../models/arcface_r50.onnx"):
+async def serve(host: str = "localhost", port: int = 50051,
+                detector_path: str = "../models/det_10g.onnx",
+                recognizer_path: str = "../models/arcface_r50.onnx",
+                batch_size: int = 1, batch_wait_ms: float = 5.0,
+                max_concurrency: int = PREPROCESS_WORKERS,
+                detector_int8: bool = False, recognizer_int8: bool = False, use_fp16: bool = True,
+                preload_recognizer: bool = False):
     """Start gRPC server"""
     
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    # Keep OpenCV from spawning its own worker threads next to ORT's intra-op pool
+    cv2.setNumThreads(1)
+    # Detector and recognizer sessions share one CPU memory arena
+    init_ort_environment()
     
-    servicer = InferenceServicer(detector_path, recognizer_path)
+    server = grpc.aio.server(options=[('grpc.max_receive_message_length', MAX_MESSAGE_BYTES)])
+    
+    servicer = InferenceServicer(detector_path, recognizer_path, batch_size, batch_wait_ms,
+                                 max_concurrency, detector_int8, recognizer_int8, use_fp16)
     inference_pb2_grpc.add_FaceInferenceServicer_to_server(servicer, server)
     
     address = f"{host}:{port}"
@@ -663,16 +1236,24 @@ def serve(host: str = "localhost", port: int = 50051,
     logger.info(f"Starting inference service on {address}")
     logger.info(f"Device: {servicer.device}")
     logger.info(f"Detector: {detector_path}")
-    logger.info(f"Recognizer: {recognizer_path}")
+    logger.info(f"Recognizer: {recognizer_path} "
+                f"({'loaded in the background' if preload_recognizer else 'loaded on first use'})")
+    logger.info(f"Preprocessing workers: {max_concurrency}")
     
-    server.start()
+    await server.start()
     logger.info("Service ready")
     
+    # The recognizer is loaded on first use, so detection-only deployments never
+    # pay for it; on request it loads and warms up while the first detections are served
+    preload = asyncio.create_task(servicer.preload_recognizer()) if preload_recognizer else None
+    
     try:
-        server.wait_for_termination()
-    except KeyboardInterrupt:
+        await server.wait_for_termination()
+    except asyncio.CancelledError:
         logger.info("Shutting down...")
-        server.stop(0)
+        if preload is not None:
+            preload.cancel()
+        await server.stop(0)
 
 
 if __name__ == "__main__":
@@ -685,7 +1266,28 @@ if __name__ == "__main__":
                        help="Path to face detector model")
     parser.add_argument("--recognizer", default="../models/arcface_r50.onnx",
                        help="Path to face recognizer model")
+    parser.add_argument("--batch-size", type=int, default=1,
+                       help="Max detection requests batched into one inference (1 disables batching)")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0,
+                       help="How long to wait for a detection batch to fill")
+    parser.add_argument("--max-concurrency", type=int, default=PREPROCESS_WORKERS,
+                       help="Requests decoded and preprocessed in parallel")
+    parser.add_argument("--detector-int8", action="store_true",
+                       help="Use the detector's INT8 variant (<model>.int8.onnx) on CPU when it exists")
+    parser.add_argument("--recognizer-int8", action="store_true",
+                       help="Use the recognizer's INT8 variant (<model>.int8.onnx) on CPU when it exists; "
+                            "embeddings change slightly, so users must re-enroll after switching")
+    parser.add_argument("--fp16", action=argparse.BooleanOptionalAction, default=True,
+                       help="Use the models' FP16 variants (<model>.fp16.onnx) on GPU providers when they exist")
+    parser.add_argument("--preload-recognizer", action="store_true",
+                       help="Load the face recognizer at startup instead of on the first embedding request")
     
     args = parser.parse_args()
     
-    serve(args.host, args.port, args.detector, args.recognizer)
+    try:
+        asyncio.run(serve(args.host, args.port, args.detector, args.recognizer,
+                          args.batch_size, args.batch_wait_ms, max(1, args.max_concurrency),
+                          args.detector_int8, args.recognizer_int8, args.fp16,
+                          args.preload_recognizer))
+    except KeyboardInterrupt:
+        pass
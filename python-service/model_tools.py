@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+LinuxHello Model Tools
+Offline conversions of the ONNX models used by the inference service
+
+Requires the `onnx` and `sympy` packages in addition to the service requirements.
+"""
+
+import os
+import logging
+import argparse
+from typing import Iterator, List, Optional
+
+import numpy as np
+import cv2
+
+from inference_service import (ARCFACE_TEMPLATE, PROVIDERS, FaceDetector, FaceRecognizer,
+                               fp16_model_path, int8_model_path, optimized_model_path)
+
+# Input normalization of each model: (pixel - mean) * scale on RGB channels
+DETECTOR_NORMALIZATION = (127.5, 1.0 / 128.0)
+RECOGNIZER_NORMALIZATION = (0.0, 1.0 / 255.0)
+
+# Lowest INT8 vs FP32 embedding cosine similarity accepted for the recognizer;
+# stored templates were enrolled with FP32 embeddings
+MIN_INT8_SIMILARITY = 0.99
+
+# Square input resolution the service feeds each model
+DETECTOR_INPUT_SIZE = 640
+RECOGNIZER_INPUT_SIZE = 112
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_images(image_dir: str, limit: int) -> List[str]:
+    """List up to `limit` image files in a directory"""
+    paths = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not paths:
+        raise ValueError(f"No images found in {image_dir}")
+    return paths[:limit]
+
+
+def iter_images(paths: List[str]) -> Iterator[np.ndarray]:
+    """Load BGR images one at a time, skipping unreadable files"""
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning(f"Skipping unreadable image {path}")
+            continue
+        yield image
+
+
+def detector_inputs(model_path: str, paths: List[str]) -> Iterator[np.ndarray]:
+    """Yield SCRFD input tensors preprocessed exactly like the service does"""
+    detector = FaceDetector(model_path, use_int8=False, use_fp16=False)
+    for image in iter_images(paths):
+        input_data, _ = detector.preprocess(image)
+        yield input_data
+
+
+def recognizer_inputs(model_path: str, paths: List[str]) -> Iterator[np.ndarray]:
+    """Yield ArcFace input tensors from face crops"""
+    recognizer = FaceRecognizer(model_path, use_int8=False, use_fp16=False)
+    for image in iter_images(paths):
+        # The crops are already aligned, so the template landmarks give an identity warp
+        face = cv2.resize(image, recognizer.input_size, interpolation=cv2.INTER_LINEAR)
+        yield recognizer.preprocess(face, ARCFACE_TEMPLATE)
+
+
+def quantize_model(model_path: str, output_path: str, inputs: Iterator[np.ndarray]):
+    """Statically quantize a model to INT8 (QDQ, per-channel S8S8) using calibration inputs"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name = ort.InferenceSession(
+        model_path, providers=['CPUExecutionProvider']
+    ).get_inputs()[0].name
+
+    class Reader(CalibrationDataReader):
+        def get_next(self) -> Optional[dict]:
+            data = next(inputs, None)
+            return None if data is None else {input_name: data}
+
+    # Shape inference and graph cleanup make quantization cover more nodes
+    prepared_path = f"{os.path.splitext(output_path)[0]}.prep.onnx"
+    quant_pre_process(model_path, prepared_path)
+    try:
+        quantize_static(
+            prepared_path, output_path, Reader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QInt8,
+            weight_type=QuantType.QInt8,
+        )
+    finally:
+        os.remove(prepared_path)
+
+    logger.info(f"Wrote {output_path}")
+
+
+def verify_recognizer(fp32_path: str, int8_path: str, paths: List[str]) -> bool:
+    """Compare FP32 and INT8 embeddings on the calibration crops; True if INT8 is close enough"""
+    fp32 = FaceRecognizer(fp32_path, use_int8=False, use_fp16=False)
+    int8 = FaceRecognizer(int8_path, use_int8=False, use_fp16=False)
+
+    # The crops are already aligned, so the template landmarks give an identity warp
+    similarities = []
+    for image in iter_images(paths):
+        face = cv2.resize(image, fp32.input_size, interpolation=cv2.INTER_LINEAR)
+        a = fp32.extract_embedding(face, ARCFACE_TEMPLATE)
+        b = int8.extract_embedding(face, ARCFACE_TEMPLATE)
+        similarities.append(float(np.dot(a, b)))
+
+    worst = min(similarities)
+    logger.info(f"INT8 vs FP32 embedding cosine similarity: mean={np.mean(similarities):.4f}, "
+                f"min={worst:.4f} over {len(similarities)} faces")
+    return worst >= MIN_INT8_SIMILARITY
+
+
+def convert_to_fp16(model_path: str, output_path: str):
+    """Convert a model's weights and activations to FP16, keeping FP32 inputs and outputs"""
+    import onnx
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    # FP32 I/O keeps the service's preprocessing unchanged; the Casts at the
+    # graph boundary are cheap next to the convolutions
+    model = convert_float_to_float16(onnx.load(model_path), keep_io_types=True)
+
+    onnx.save(model, output_path)
+    logger.info(f"Wrote {output_path}")
+
+
+def nhwc_model_path(model_path: str) -> str:
+    """Path of the uint8 NHWC variant of a model"""
+    return f"{os.path.splitext(model_path)[0]}.nhwc.onnx"
+
+
+def bake_preprocessing(model_path: str, output_path: str, mean: float, scale: float):
+    """
+    Rewrite a model to take uint8 BGR NHWC images instead of normalized NCHW floats.
+
+    The new input feeds Cast -> Gather (BGR->RGB) -> Sub -> Mul -> Transpose
+    into the original one, which ORT folds into the first convolution.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    model = onnx.load(model_path)
+    graph = model.graph
+    initializers = {init.name for init in graph.initializer}
+    original = next(i for i in graph.input if i.name not in initializers)
+    dims = original.type.tensor_type.shape.dim
+    if len(dims) != 4 or dims[1].dim_value != 3:
+        raise ValueError(f"{model_path}: expected an NCHW input with 3 channels")
+
+    # New uint8 input with the same batch/spatial dims, channels last
+    image = helper.make_tensor_value_info(original.name, TensorProto.UINT8, None)
+    for dim in (dims[0], dims[2], dims[3], dims[1]):
+        image.type.tensor_type.shape.dim.add().CopyFrom(dim)
+
+    # Consumers of the old input now read the normalized tensor
+    normalized = f"{original.name}_nchw"
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == original.name:
+                node.input[i] = normalized
+
+    prefix = "preprocess_"
+    graph.initializer.extend([
+        numpy_helper.from_array(np.array([2, 1, 0], dtype=np.int64), prefix + "bgr_to_rgb"),
+        numpy_helper.from_array(np.array(mean, dtype=np.float32), prefix + "mean"),
+        numpy_helper.from_array(np.array(scale, dtype=np.float32), prefix + "scale"),
+    ])
+    nodes = [
+        helper.make_node("Cast", [original.name], [prefix + "float"], to=TensorProto.FLOAT),
+        helper.make_node("Gather", [prefix + "float", prefix + "bgr_to_rgb"], [prefix + "rgb"], axis=3),
+        helper.make_node("Sub", [prefix + "rgb", prefix + "mean"], [prefix + "centered"]),
+        helper.make_node("Mul", [prefix + "centered", prefix + "scale"], [prefix + "scaled"]),
+        helper.make_node("Transpose", [prefix + "scaled"], [normalized], perm=[0, 3, 1, 2]),
+    ]
+    for node in reversed(nodes):
+        graph.node.insert(0, node)
+
+    graph.input.remove(original)
+    graph.input.insert(0, image)
+
+    onnx.checker.check_model(model)
+    onnx.save(model, output_path)
+    logger.info(f"Wrote {output_path}")
+
+
+def fixed_model_path(model_path: str) -> str:
+    """Path of the fixed-shape variant of a model"""
+    return f"{os.path.splitext(model_path)[0]}.fixed.onnx"
+
+
+def fix_input_shape(model_path: str, output_path: str, size: int, batch: int):
+    """Replace the symbolic input dimensions of a model with the static shape the service uses"""
+    import onnx
+    from onnxruntime.tools.onnx_model_utils import fix_output_shapes, make_input_shape_fixed
+
+    model = onnx.load(model_path)
+    initializers = {init.name for init in model.graph.initializer}
+    model_input = next(i for i in model.graph.input if i.name not in initializers)
+    dims = model_input.type.tensor_type.shape.dim
+
+    # Float models are NCHW; models converted by the nhwc command are NHWC
+    if len(dims) == 4 and dims[1].dim_value == 3:
+        shape = [batch, 3, size, size]
+    elif len(dims) == 4 and dims[3].dim_value == 3:
+        shape = [batch, size, size, 3]
+    else:
+        raise ValueError(f"{model_path}: expected a 3-channel NCHW or NHWC input")
+
+    make_input_shape_fixed(model.graph, model_input.name, shape)
+    fix_output_shapes(model)
+
+    onnx.save(model, output_path)
+    logger.info(f"Wrote {output_path} with input shape {shape}")
+
+
+def cmd_quantize(args):
+    """Quantize the detector and/or recognizer to INT8"""
+    paths = list_images(args.calibration_dir, args.num_images)
+    logger.info(f"Calibrating with {len(paths)} images from {args.calibration_dir}")
+
+    if args.detector:
+        quantize_model(args.detector, int8_model_path(args.detector),
+                       detector_inputs(args.detector, paths))
+    if args.recognizer:
+        # The service picks up <model>.int8.onnx automatically, so the recognizer
+        # only gets that name once its embeddings are verified against FP32
+        output = int8_model_path(args.recognizer)
+        candidate = f"{os.path.splitext(output)[0]}.unverified.onnx"
+        quantize_model(args.recognizer, candidate, recognizer_inputs(args.recognizer, paths))
+        try:
+            verified = verify_recognizer(args.recognizer, candidate, paths)
+        finally:
+            # Verification loads the candidate, which caches its optimized graph
+            cache = optimized_model_path(candidate, PROVIDERS[0])
+            if os.path.exists(cache):
+                os.remove(cache)
+        if not verified:
+            os.remove(candidate)
+            logger.error(f"INT8 recognizer deviates from FP32 by more than {1 - MIN_INT8_SIMILARITY:.2f}; "
+                         f"not writing {output}. Try a larger or more representative calibration set")
+            raise SystemExit(1)
+        os.replace(candidate, output)
+        logger.info(f"Verified and wrote {output}")
+
+
+def cmd_fp16(args):
+    """Convert the detector and/or recognizer to FP16"""
+    if args.detector:
+        convert_to_fp16(args.detector, fp16_model_path(args.detector))
+    if args.recognizer:
+        convert_to_fp16(args.recognizer, fp16_model_path(args.recognizer))
+
+
+def cmd_nhwc(args):
+    """Bake input normalization and layout into the detector and/or recognizer"""
+    if args.detector:
+        bake_preprocessing(args.detector, nhwc_model_path(args.detector), *DETECTOR_NORMALIZATION)
+    if args.recognizer:
+        bake_preprocessing(args.recognizer, nhwc_model_path(args.recognizer), *RECOGNIZER_NORMALIZATION)
+
+
+def cmd_fix_shape(args):
+    """Freeze the input shape of the detector and/or recognizer"""
+    if args.detector:
+        fix_input_shape(args.detector, fixed_model_path(args.detector), DETECTOR_INPUT_SIZE, args.batch)
+    if args.recognizer:
+        fix_input_shape(args.recognizer, fixed_model_path(args.recognizer), RECOGNIZER_INPUT_SIZE, args.batch)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="LinuxHello Model Tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    quantize = subparsers.add_parser(
+        "quantize", help="Create INT8 models (<model>.int8.onnx) used on the CPU provider")
+    quantize.add_argument("--detector", help="Path to FP32 face detector model")
+    quantize.add_argument("--recognizer", help="Path to FP32 face recognizer model")
+    quantize.add_argument("--calibration-dir", required=True,
+                          help="Directory of face images (aligned crops for the recognizer)")
+    quantize.add_argument("--num-images", type=int, default=100,
+                          help="Number of calibration images to use")
+    quantize.set_defaults(func=cmd_quantize)
+
+    fp16 = subparsers.add_parser(
+        "fp16", help="Create FP16 models (<model>.fp16.onnx) used on GPU providers")
+    fp16.add_argument("--detector", help="Path to FP32 face detector model")
+    fp16.add_argument("--recognizer", help="Path to FP32 face recognizer model")
+    fp16.set_defaults(func=cmd_fp16)
+
+    nhwc = subparsers.add_parser(
+        "nhwc", help="Create models (<model>.nhwc.onnx) that take uint8 BGR images directly")
+    nhwc.add_argument("--detector", help="Path to face detector model")
+    nhwc.add_argument("--recognizer", help="Path to face recognizer model")
+    nhwc.set_defaults(func=cmd_nhwc)
+
+    fix_shape = subparsers.add_parser(
+        "fix-shape", help="Create models (<model>.fixed.onnx) with a static input shape")
+    fix_shape.add_argument("--detector", help="Path to face detector model")
+    fix_shape.add_argument("--recognizer", help="Path to face recognizer model")
+    fix_shape.add_argument("--batch", type=int, default=1,
+                           help="Static batch size (detector batching needs a dynamic batch, "
+                                "so fixed models run one image at a time)")
+    fix_shape.set_defaults(func=cmd_fix_shape)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()